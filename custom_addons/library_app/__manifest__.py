@@ -30,6 +30,7 @@ Features include:
         # Dados
         # 'data/product_category_data.xml',  # Removido - não usa mais produtos
         'data/library_book_stage_data.xml',
+        'data/library_cron_data.xml',
 
         # Views (carregadas antes das ações e menus)
         'views/book_view.xml',
@@ -47,10 +48,16 @@ Features include:
 
         # Ações
         'views/book_action.xml',
+        'views/book_bulk_views.xml',
         'views/author_action.xml',
         'views/category_action.xml',
         'views/stage_action.xml',
         'views/loan_action.xml',
+        'views/hold_views.xml',
+        'views/book_import_views.xml',
+        'views/library_export_views.xml',
+        'views/loan_report_views.xml',
+        'views/perf_sample_views.xml',
 
         # Menus
         'views/library_menu.xml',
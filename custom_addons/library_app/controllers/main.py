@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+import base64
+import binascii
+import hashlib
+import json
+
+from werkzeug.http import http_date, is_resource_modified
+from werkzeug.wrappers import Response
+
+from odoo import api, http
+from odoo.http import content_disposition, request
+
+from ..models.library_book import normalize_isbn
+
+# Limite de ids + ISBNs por chamada da API de disponibilidade
+MAX_AVAILABILITY_KEYS = 5000
+# Tipo de conteúdo dos arquivos exportados, por formato
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+# Tamanho de página padrão/máximo do catálogo e linhas por ida ao banco
+CATALOGUE_PAGE_SIZE = 500
+CATALOGUE_MAX_PAGE_SIZE = 5000
+CATALOGUE_FETCH_SIZE = 200
+
+
+def encode_cursor(name, book_id):
+    """Cursor opaco da paginação do catálogo: a chave ``(name, id)`` em base64."""
+    return base64.urlsafe_b64encode(json.dumps([name, book_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Chave ``(name, id)`` de um cursor de ``encode_cursor``."""
+    try:
+        name, book_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(name, str) or not isinstance(book_id, int):
+        raise ValueError("Invalid cursor.")
+    return name, book_id
+
+
+class LibraryApi(http.Controller):
+    """API HTTP leve para os quiosques de autoatendimento e o widget do site."""
+
+    def _json_response(self, payload, status=200, headers=None):
+        return request.make_response(
+            json.dumps(payload),
+            headers=[('Content-Type', 'application/json')] + (headers or []),
+            status=status,
+        )
+
+    def _availability_keys(self):
+        """Ids e ISBNs da query string (``ids=1,2&isbns=...``) ou de um corpo JSON."""
+        params = request.httprequest.args
+        if request.httprequest.method == 'POST':
+            try:
+                body = json.loads(request.httprequest.get_data() or b'{}')
+            except ValueError:
+                raise ValueError("Invalid JSON body.")
+            raw_ids, raw_isbns = body.get('ids') or [], body.get('isbns') or []
+        else:
+            raw_ids = [key for key in params.get('ids', '').split(',') if key.strip()]
+            raw_isbns = [key for key in params.get('isbns', '').split(',') if key.strip()]
+        if len(raw_ids) + len(raw_isbns) > MAX_AVAILABILITY_KEYS:
+            raise ValueError(f"At most {MAX_AVAILABILITY_KEYS} ids and ISBNs per request.")
+        try:
+            book_ids = sorted({int(book_id) for book_id in raw_ids})
+        except (TypeError, ValueError):
+            raise ValueError("Book ids must be integers.")
+        isbns = {str(code): normalize_isbn(str(code)) for code in raw_isbns}
+        return book_ids, isbns
+
+    @http.route('/library/api/availability', type='http', auth='public',
+                methods=['GET', 'POST'], csrf=False, readonly=True)
+    def availability(self, **kwargs):
+        """Disponibilidade de até ``MAX_AVAILABILITY_KEYS`` livros por id ou ISBN.
+
+        O ETag e o Last-Modified vêm de ``_get_availability_timestamp``: uma
+        consulta de verificação responde 304 a sondagens sem mudanças, antes
+        de ler qualquer livro.
+        """
+        try:
+            book_ids, isbns = self._availability_keys()
+        except ValueError as error:
+            return self._json_response({'error': str(error)}, status=400)
+        valid_isbns = sorted({isbn for isbn in isbns.values() if isbn})
+        Book = request.env['library.book'].sudo()
+
+        last_modified = Book._get_availability_timestamp(book_ids, valid_isbns)
+        etag = hashlib.sha1(json.dumps(
+            [str(last_modified), book_ids, valid_isbns]
+        ).encode()).hexdigest()
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'no-cache')]
+        if last_modified:
+            headers.append(('Last-Modified', http_date(last_modified)))
+        if not is_resource_modified(request.httprequest.environ, etag=etag, last_modified=last_modified):
+            return request.make_response('', headers=headers, status=304)
+
+        books = []
+        found_ids, found_isbns = set(), set()
+        for book_id, isbn, available, status, expected in Book._get_availability(book_ids, valid_isbns):
+            found_ids.add(book_id)
+            found_isbns.add(isbn)
+            books.append({
+                'id': book_id,
+                'isbn': isbn or None,
+                'available_copies': available,
+                'book_status': status,
+                'expected_return_date': expected.isoformat() if expected else None,
+            })
+        return self._json_response({
+            'books': books,
+            'missing': {
+                'ids': [book_id for book_id in book_ids if book_id not in found_ids],
+                'isbns': [code for code, isbn in isbns.items() if isbn not in found_isbns],
+            },
+        }, headers=headers)
+
+    @http.route('/library/api/catalogue', type='http', auth='public', methods=['GET'], readonly=True)
+    def catalogue(self, cursor=None, limit=None, **kwargs):
+        """Catálogo público em NDJSON, paginado por chave ``(name, id)``.
+
+        Uma linha JSON por livro e uma última linha ``{"next_cursor": ...}``
+        (nulo no fim do catálogo). As linhas saem de um cursor nomeado do
+        PostgreSQL (server-side), aberto num cursor próprio do registro porque
+        a resposta é gerada depois do fim da requisição: a memória fica
+        limitada a ``CATALOGUE_FETCH_SIZE`` linhas, qualquer que seja a página.
+        """
+        try:
+            after = decode_cursor(cursor) if cursor else None
+            limit = min(int(limit or CATALOGUE_PAGE_SIZE), CATALOGUE_MAX_PAGE_SIZE)
+            if limit <= 0:
+                raise ValueError("The page size must be positive.")
+        except ValueError as error:
+            return self._json_response({'error': str(error)}, status=400)
+        query = request.env['library.book']._catalogue_query(after, limit)
+        registry = request.env.registry
+
+        def generate():
+            with registry.cursor(readonly=True) as cr:
+                rows = cr._cnx.cursor('library_catalogue')
+                rows.itersize = CATALOGUE_FETCH_SIZE
+                try:
+                    rows.execute(query.code, query.params)
+                    count, last = 0, None
+                    for book_id, name, isbn, author, categories, status, cover_version in rows:
+                        count, last = count + 1, (name, book_id)
+                        yield json.dumps({
+                            'id': book_id,
+                            'title': name,
+                            'isbn': isbn or None,
+                            'author': author,
+                            'categories': categories,
+                            'status': status,
+                            'thumbnail_url': (
+                                f'/library/api/catalogue/cover/{book_id}?unique={cover_version}'
+                                if cover_version else None
+                            ),
+                        }) + '\n'
+                finally:
+                    rows.close()
+            next_cursor = encode_cursor(*last) if count == limit else None
+            yield json.dumps({'next_cursor': next_cursor}) + '\n'
+
+        return Response(generate(), mimetype='application/x-ndjson', direct_passthrough=True)
+
+    @http.route('/library/api/catalogue/cover/<int:book_id>', type='http', auth='public',
+                methods=['GET'], readonly=True)
+    def catalogue_cover(self, book_id, unique=None, **kwargs):
+        """Miniatura (``cover_128``) de um livro ativo do catálogo público.
+
+        Visitantes anônimos não leem ``library.book``: a rota expõe apenas a
+        miniatura da capa dos livros ativos. Com ``unique`` (versão da capa,
+        vinda do catálogo) a resposta pode ser guardada em cache sem prazo.
+        """
+        book = request.env['library.book'].sudo().browse(book_id).exists()
+        if not book or not book.active or not book.cover_128:
+            raise request.not_found()
+        stream = request.env['ir.binary']._get_image_stream_from(book, 'cover_128')
+        return stream.get_response(immutable=bool(unique))
+
+    @http.route('/library/export/<int:export_id>', type='http', auth='user', methods=['GET'], readonly=True)
+    def export(self, export_id, **kwargs):
+        """Download da exportação configurada no assistente ``library.export``.
+
+        O arquivo é gerado enquanto é enviado, num cursor próprio do registro
+        (a resposta continua depois do fim da requisição).
+        """
+        wizard = request.env['library.export'].browse(export_id).exists()
+        if not wizard:
+            raise request.not_found()
+        options = wizard._get_export_options()
+        filename = wizard._get_filename(options['export_type'], options['file_format'], options['compress'])
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+
+        def generate():
+            with registry.cursor(readonly=True) as cr:
+                env = api.Environment(cr, uid, context)
+                yield from env['library.export']._iter_export(**options)
+
+        mimetype = 'application/gzip' if options['compress'] else EXPORT_MIMETYPES[options['file_format']]
+        return Response(
+            generate(),
+            mimetype=mimetype,
+            headers=[('Content-Disposition', content_disposition(filename))],
+            direct_passthrough=True,
+        )
@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
+from . import bulk_mixin
+from . import perf_sample
 from . import library_book
 from . import stage
 from . import category
 from . import partner
-from . import loan
\ No newline at end of file
+from . import loan
+from . import loan_archive
+from . import hold
+from . import borrower_stats
+from . import book_import
+from . import book_stage_move
+from . import library_export
+from . import loan_report
+from . import data_generator
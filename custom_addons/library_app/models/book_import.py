@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+import logging
+import threading
+from itertools import islice
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Prefixo dos parâmetros de sistema que guardam o progresso de cada importação
+PROGRESS_PARAM = 'library_app.book_import.%s'
+
+
+class LibraryBookImport(models.TransientModel):
+    """Importador de catálogo em fluxo contínuo (CSV ou JSON-lines).
+
+    O arquivo é lido linha a linha por geradores e os livros são criados em
+    lotes de ``chunk_size`` via ``create(vals_list)``, em modo em massa.
+    Autores e categorias de cada lote são resolvidos (ou criados) com uma
+    consulta por lote. Cada lote é confirmado junto com o progresso, de modo
+    que uma importação interrompida recomeça do último lote gravado e a
+    memória usada não depende do tamanho do arquivo.
+
+    Colunas: ``name`` (obrigatória), ``isbn``, ``pages``, ``date_published``,
+    ``total_copies``, ``description``, ``author`` (nome do autor) e
+    ``categories`` (códigos separados por ``;`` no CSV, lista no JSON).
+    """
+    _name = 'library.book.import'
+    _description = 'Library Catalogue Import'
+
+    data_file = fields.Binary(string='File', required=True, attachment=True)
+    filename = fields.Char(string='File Name')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ], string='Format', required=True, default='csv')
+    chunk_size = fields.Integer(string='Chunk Size', default=1000, required=True)
+
+    @api.onchange('filename')
+    def _onchange_filename(self):
+        if self.filename and self.filename.lower().endswith(('.jsonl', '.ndjson')):
+            self.file_format = 'jsonl'
+
+    def action_import(self):
+        """Importa o arquivo enviado, lendo-o direto do filestore."""
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'data_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            stream = open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            stream = io.BytesIO(attachment.raw or b'')
+        with stream:
+            count = self.import_stream(
+                stream, self.file_format,
+                chunk_size=self.chunk_size,
+                job_key=attachment.checksum,
+            )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Catalogue Import',
+                'message': f"{count} book(s) imported.",
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    # Motor de importação
+
+    @api.model
+    def import_stream(self, stream, file_format, chunk_size=1000, job_key=None):
+        """Importa livros de um arquivo binário aberto, lote a lote.
+
+        Args:
+            stream: binary file object (CSV or JSON-lines, UTF-8)
+            file_format: 'csv' or 'jsonl'
+            chunk_size: number of rows created per ``create`` call
+            job_key: identifies the import for resuming (e.g. file checksum)
+
+        Returns:
+            Number of books created by this run
+        """
+        if chunk_size <= 0:
+            raise ValidationError("Chunk size must be greater than zero.")
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        params = self.env['ir.config_parameter'].sudo()
+        param_key = job_key and PROGRESS_PARAM % job_key
+        done = int(params.get_param(param_key, 0)) if param_key else 0
+        if done:
+            _logger.info("Resuming catalogue import %s after %s row(s)", job_key, done)
+
+        rows = islice(self._iter_rows(stream, file_format), done, None)
+        Book = self.env['library.book'].with_context(library_bulk_mode=True, mail_create_nolog=True)
+        created = 0
+        while chunk := list(islice(rows, chunk_size)):
+            Book.create(self._prepare_book_vals(chunk, first_line=done + 1))
+            done += len(chunk)
+            created += len(chunk)
+            if param_key:
+                params.set_param(param_key, str(done))
+            self.env.flush_all()
+            if auto_commit:
+                self.env.cr.commit()
+            # O cache do ambiente cresceria a cada lote
+            self.env.invalidate_all()
+            _logger.info("Catalogue import: %s row(s) done", done)
+
+        if param_key:
+            params.set_param(param_key, False)
+        return created
+
+    @api.model
+    def _iter_rows(self, stream, file_format):
+        """Gera um dicionário por linha do arquivo, sem carregá-lo inteiro."""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        try:
+            if file_format == 'csv':
+                yield from csv.DictReader(text)
+            elif file_format == 'jsonl':
+                # Numeração das linhas igual à de ``_prepare_book_vals``
+                row_number = 0
+                for line in text:
+                    if not line.strip():
+                        continue
+                    row_number += 1
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise ValidationError(f"Line {row_number}: invalid JSON ({e}).")
+            else:
+                raise ValidationError(f"Unsupported import format: {file_format}")
+        finally:
+            # Não fecha o arquivo do chamador junto com o wrapper
+            text.detach()
+
+    @api.model
+    def _prepare_book_vals(self, rows, first_line=1):
+        """Converte um lote de linhas em valores de ``library.book``.
+
+        As linhas lidas não são alteradas; qualquer valor inválido gera um
+        ``ValidationError`` com o número da linha.
+        """
+        row_codes = []
+        for line, row in enumerate(rows, start=first_line):
+            if not isinstance(row, dict):
+                raise ValidationError(
+                    f"Line {line}: each row must be an object, got {type(row).__name__}."
+                )
+            row_codes.append(self._split_categories(row.get('categories'), line))
+        authors = self._resolve_authors({
+            (row.get('author') or '').strip() for row in rows
+        } - {''})
+        categories = self._resolve_categories({code for codes in row_codes for code in codes})
+
+        vals_list = []
+        for line, row, codes in zip(range(first_line, first_line + len(rows)), rows, row_codes):
+            name = (row.get('name') or '').strip()
+            if not name:
+                raise ValidationError(f"Line {line}: the book title is required.")
+            vals = {
+                'name': name,
+                'isbn': (row.get('isbn') or '').strip() or False,
+                'description': row.get('description') or False,
+                'date_published': self._parse_date(row.get('date_published'), line),
+                'author_id': authors.get((row.get('author') or '').strip(), False),
+                'category_ids': [(6, 0, [categories[code] for code in codes])],
+            }
+            for fname in ('pages', 'total_copies'):
+                if row.get(fname) not in (None, ''):
+                    try:
+                        vals[fname] = int(row[fname])
+                    except (TypeError, ValueError):
+                        raise ValidationError(
+                            f"Line {line}: {fname} must be a whole number, got {row[fname]!r}."
+                        )
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def _parse_date(self, value, line):
+        """Data de publicação de uma linha (``AAAA-MM-DD``), ou ``False``."""
+        if value in (None, ''):
+            return False
+        try:
+            return fields.Date.to_date(value)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                f"Line {line}: date_published must be a YYYY-MM-DD date, got {value!r}."
+            )
+
+    @api.model
+    def _split_categories(self, value, line):
+        """Códigos de categoria de uma linha: texto separado por ``;`` ou lista."""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(';')
+        elif not isinstance(value, list) or not all(isinstance(code, str) for code in value):
+            raise ValidationError(
+                f"Line {line}: categories must be a list of codes or a ';'-separated string."
+            )
+        return [code.strip() for code in value if code.strip()]
+
+    @api.model
+    def _resolve_authors(self, names):
+        """Mapeia nomes para autores, criando os que faltam (uma busca por lote)."""
+        if not names:
+            return {}
+        Partner = self.env['res.partner']
+        authors = Partner.search_fetch(
+            [('is_author', '=', True), ('name', 'in', list(names))], ['name'], order='id',
+        )
+        result = {}
+        for author in authors:
+            result.setdefault(author.name, author.id)
+        missing = sorted(names - result.keys())
+        if missing:
+            new_authors = Partner.with_context(tracking_disable=True).create([
+                {'name': name, 'is_author': True} for name in missing
+            ])
+            result.update(zip(missing, new_authors.ids))
+        return result
+
+    @api.model
+    def _resolve_categories(self, codes):
+        """Mapeia códigos para categorias, criando as que faltam (uma busca por lote).
+
+        Um valor que não é código de nenhuma categoria pode ser o nome de uma
+        existente; só os demais viram categorias novas (``name = code``), que
+        assim não colidem com ``category_name_unique``.
+        """
+        if not codes:
+            return {}
+        Category = self.env['library.book.category'].with_context(active_test=False)
+        categories = Category.search_fetch(
+            ['|', ('code', 'in', list(codes)), ('name', 'in', list(codes))], ['code', 'name'],
+        )
+        result = {categ.code: categ.id for categ in categories if categ.code in codes}
+        for categ in categories:
+            if categ.name in codes:
+                result.setdefault(categ.name, categ.id)
+        missing = sorted(codes - result.keys())
+        if missing:
+            new_categories = Category.with_context(library_bulk_mode=True).create([
+                {'name': code, 'code': code} for code in missing
+            ])
+            result.update(zip(missing, new_categories.ids))
+        return result
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class LibraryBookStageMove(models.TransientModel):
+    """Assistente para mover a seleção da lista de livros para um estágio.
+
+    Os livros vêm de ``active_ids`` e são movidos com um único ``write`` em
+    modo em massa (ver ``library.book.action_bulk_set_stage``).
+    """
+    _name = 'library.book.stage.move'
+    _description = 'Move Books to Stage'
+
+    stage_id = fields.Many2one('library.book.stage', string='Stage', required=True)
+
+    def action_apply(self):
+        self.ensure_one()
+        books = self.env['library.book'].browse(self.env.context.get('active_ids', []))
+        return books.action_bulk_set_stage(self.stage_id)
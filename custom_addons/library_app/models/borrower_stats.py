@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class LibraryBorrowerStats(models.Model):
+    """Métricas de empréstimo por mutuário.
+
+    Mantidas fora de ``res_partner`` (a tabela mais disputada do banco) numa
+    tabela estreita, atualizada por uma única agregação por lote de parceiros.
+    """
+    _name = 'library.borrower.stats'
+    _description = 'Library Borrower Statistics'
+    _rec_name = 'partner_id'
+    _order = 'partner_id'
+
+    partner_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Borrower',
+        required=True,
+        ondelete='cascade',
+        index=True,
+        readonly=True,
+    )
+    active_loans_count = fields.Integer(
+        string="Active Loans",
+        readonly=True,
+        help="Number of ongoing book loans"
+    )
+    overdue_loans_count = fields.Integer(
+        string="Overdue Loans",
+        readonly=True,
+        help="Number of overdue book loans"
+    )
+    on_time_loans_count = fields.Integer(
+        string="On Time Loans",
+        readonly=True,
+        help="Number of ongoing loans that are still on time"
+    )
+
+    _sql_constraints = [
+        ('partner_unique', 'unique(partner_id)', 'Each borrower has a single statistics row.'),
+    ]
+
+    _UPSERT_QUERY = """
+        INSERT INTO library_borrower_stats (
+            partner_id, active_loans_count, overdue_loans_count, on_time_loans_count,
+            create_uid, create_date, write_uid, write_date
+        )
+        SELECT partner.id,
+               COUNT(loan.id),
+               COUNT(loan.id) FILTER (WHERE loan.is_overdue),
+               COUNT(loan.id) FILTER (WHERE loan.is_overdue IS NOT TRUE),
+               %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+          FROM res_partner partner
+          LEFT JOIN library_book_loan loan
+                 ON loan.partner_id = partner.id
+                AND loan.state = 'ongoing'
+         WHERE {where}
+      GROUP BY partner.id
+        ON CONFLICT (partner_id) DO {conflict}
+    """
+
+    _UPSERT_UPDATE = """
+        UPDATE SET active_loans_count = EXCLUDED.active_loans_count,
+                   overdue_loans_count = EXCLUDED.overdue_loans_count,
+                   on_time_loans_count = EXCLUDED.on_time_loans_count,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+    """
+
+    def init(self):
+        """Preenche a tabela para mutuários que ainda não têm métricas."""
+        self.env.cr.execute(self._UPSERT_QUERY.format(
+            where="partner.id IN (SELECT DISTINCT partner_id FROM library_book_loan)",
+            conflict="NOTHING",
+        ), {'uid': self.env.uid})
+
+    @api.model
+    def _refresh(self, partner_ids):
+        """Recalcula as métricas dos parceiros indicados com uma única consulta.
+
+        Args:
+            partner_ids: ids (ou recordset) de ``res.partner`` afetados.
+        """
+        partner_ids = tuple({pid for pid in getattr(partner_ids, 'ids', partner_ids) if pid})
+        if not partner_ids:
+            return
+        self.env['library.book.loan'].flush_model(['partner_id', 'state', 'is_overdue'])
+        self.env.cr.execute(self._UPSERT_QUERY.format(
+            where="partner.id IN %(partner_ids)s",
+            conflict=self._UPSERT_UPDATE,
+        ), {'uid': self.env.uid, 'partner_ids': partner_ids})
+        self.invalidate_model()
+        self.env['res.partner'].browse(partner_ids).invalidate_recordset([
+            'borrower_stats_ids', 'active_loans_count', 'overdue_loans_count', 'on_time_loans_count',
+        ])
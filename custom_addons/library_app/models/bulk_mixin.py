@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+# Chave de contexto do modo em massa (importações, crons, edições em massa)
+BULK_MODE = 'library_bulk_mode'
+
+
+class LibraryBulkMixin(models.AbstractModel):
+    """Modo de operação em massa para modelos da biblioteca com chatter.
+
+    Ative com ``records.with_context(library_bulk_mode=True)``. Nesse modo:
+
+    - ``create``/``write`` rodam com ``tracking_disable``: nenhum valor de
+      rastreamento, log de criação ou inscrição de seguidores por registro;
+    - mensagens por registro (ex.: "Book updated.") não são postadas;
+    - uma única mensagem de resumo é postada por lote, no primeiro registro.
+
+    Deve vir antes de ``mail.thread`` em ``_inherit`` para que o contexto seja
+    aplicado antes do rastreamento.
+    """
+    _name = 'library.bulk.mixin'
+    _description = 'Library Bulk Operation Mixin'
+
+    def _in_bulk_mode(self):
+        """Indica se o recordset está em modo de operação em massa."""
+        return bool(self.env.context.get(BULK_MODE))
+
+    def _post_bulk_summary(self, body):
+        """Posta uma única mensagem de resumo para o lote inteiro."""
+        if self:
+            self[:1].with_context(tracking_disable=True).message_post(
+                body=body,
+                subtype_xmlid='mail.mt_note',
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if not self._in_bulk_mode():
+            return super().create(vals_list)
+        records = super(LibraryBulkMixin, self.with_context(tracking_disable=True)).create(vals_list)
+        records._post_bulk_summary(
+            f"Bulk creation: {len(records)} {self._description} record(s) created."
+        )
+        return records.with_env(self.env)
+
+    def write(self, vals):
+        if not self._in_bulk_mode():
+            return super().write(vals)
+        result = super(LibraryBulkMixin, self.with_context(tracking_disable=True)).write(vals)
+        tracked = sorted(
+            self._fields[fname].string for fname in vals
+            if fname in self._fields and getattr(self._fields[fname], 'tracking', False)
+        )
+        if tracked:
+            self._post_bulk_summary(
+                f"Bulk update: {len(self)} {self._description} record(s) changed ({', '.join(tracked)})."
+            )
+        return result
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
 
 class LibraryBookCategory(models.Model):
     _name = 'library.book.category'
     _description = 'Library Book Category'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
-    _order = 'name'
+    _inherit = ['library.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
+    _order = 'complete_name'
+    _rec_name = 'complete_name'
+    _parent_store = True
 
     # Identificação
     name = fields.Char(
@@ -16,6 +19,13 @@ class LibraryBookCategory(models.Model):
         tracking=True,
         help="Full name of the category (e.g., Fiction, Non-Fiction, Biography)"
     )
+    complete_name = fields.Char(
+        string='Full Name',
+        compute='_compute_complete_name',
+        recursive=True,
+        store=True,
+        help="Category name prefixed by its ancestors (e.g., Fiction / Fantasy)"
+    )
     code = fields.Char(
         string='Technical Code',
         required=True,
@@ -63,6 +73,7 @@ class LibraryBookCategory(models.Model):
         inverse_name='parent_id',
         string='Child Categories'
     )
+    parent_path = fields.Char(index=True)
     
     # Responsável pela categoria
     user_id = fields.Many2one(
@@ -82,18 +93,20 @@ class LibraryBookCategory(models.Model):
         string='Books'
     )
 
-    # Métricas computadas (com tracking quando mudarem significativamente)
+    # Métricas computadas sobre a subárvore (categoria + descendentes)
     book_count = fields.Integer(
         string='Book Count',
-        compute='_compute_book_count',
+        compute='_compute_book_counts',
+        recursive=True,
         store=True,
-        help="Total number of books in this category"
+        help="Total number of books in this category and its subcategories"
     )
     active_book_count = fields.Integer(
         string='Active Books',
-        compute='_compute_active_book_count',
+        compute='_compute_book_counts',
+        recursive=True,
         store=True,
-        help="Number of active books in this category"
+        help="Number of active books in this category and its subcategories"
     )
     
     # Restrições de unicidade
@@ -102,33 +115,52 @@ class LibraryBookCategory(models.Model):
         ('category_name_unique', 'unique(name)', 'Category name must be unique.'),
     ]
 
-    @api.depends('book_ids')
-    def _compute_book_count(self):
-        """Conta quantos livros estão associados a esta categoria."""
+    @api.depends('name', 'parent_id.complete_name')
+    def _compute_complete_name(self):
+        """Nome completo com a hierarquia (ex.: Fiction / Fantasy)."""
         for categ in self:
-            categ.book_count = len(categ.book_ids)
-    
-    @api.depends('book_ids.active')
-    def _compute_active_book_count(self):
-        """Conta quantos livros ativos estão associados a esta categoria."""
+            if categ.parent_id:
+                categ.complete_name = f"{categ.parent_id.complete_name} / {categ.name}"
+            else:
+                categ.complete_name = categ.name
+
+    @api.depends('parent_path', 'book_ids', 'book_ids.active',
+                 'child_ids.book_count', 'child_ids.active_book_count')
+    def _compute_book_counts(self):
+        """
+        Conta os livros (distintos) da categoria e de todas as subcategorias
+        com uma única consulta: a subárvore é resolvida pelo prefixo de
+        parent_path, sem percorrer a hierarquia em Python.
+        """
+        counts = {}
+        categories = self.filtered('id')
+        if categories.ids:
+            self.flush_model(['parent_path', 'book_ids'])
+            self.env['library.book'].flush_model(['active', 'category_ids'])
+            self.env.cr.execute(SQL(
+                """
+                SELECT categ.id,
+                       COUNT(DISTINCT rel.book_id),
+                       COUNT(DISTINCT rel.book_id) FILTER (WHERE book.active)
+                  FROM library_book_category categ
+                  JOIN library_book_category sub
+                    ON sub.parent_path LIKE categ.parent_path || %s
+                  JOIN library_book_category_rel rel ON rel.category_id = sub.id
+                  JOIN library_book book ON book.id = rel.book_id
+                 WHERE categ.id IN %s
+                 GROUP BY categ.id
+                """,
+                '%', tuple(categories.ids),
+            ))
+            counts = {categ_id: (total, active) for categ_id, total, active in self.env.cr.fetchall()}
         for categ in self:
-            categ.active_book_count = len(categ.book_ids.filtered('active'))
+            categ.book_count, categ.active_book_count = counts.get(categ.id, (0, 0))
 
     @api.constrains('parent_id')
     def _check_parent_recursion(self):
         """Impede recursão infinita na hierarquia."""
-        if not self._check_recursion():
+        if self._has_cycle():
             raise ValidationError("You cannot create recursive category hierarchies.")
-
-    def name_get(self):
-        """Retorna nome com hierarquia se houver categoria pai."""
-        result = []
-        for category in self:
-            name = category.name
-            if category.parent_id:
-                name = f"{category.parent_id.name} / {name}"
-            result.append((category.id, name))
-        return result
     
     def action_open_books(self):
         """Abre a lista de livros desta categoria."""
@@ -138,7 +170,7 @@ class LibraryBookCategory(models.Model):
             'name': f'Books in {self.name}',
             'res_model': 'library.book',
             'view_mode': 'kanban,list,form',
-            'domain': [('category_ids', 'in', [self.id])],
+            'domain': [('category_ids', 'child_of', self.id)],
             'context': {
                 'default_category_ids': [(6, 0, [self.id])],
                 'search_default_group_by_stage': 1,
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+import bisect
+import itertools
+import logging
+import random
+import time
+from datetime import timedelta
+
+from psycopg2.extras import execute_values
+
+from odoo import models, fields, api
+from odoo.exceptions import AccessError
+
+from .library_book import _isbn13_check_digit
+
+_logger = logging.getLogger(__name__)
+
+# Linhas por INSERT em lote
+INSERT_PAGE_SIZE = 5000
+
+
+class LibraryDataGenerator(models.AbstractModel):
+    """Gerador de massa de dados sintética para testes de carga e performance.
+
+    Uso (``odoo-bin shell``)::
+
+        env['library.data.generator'].generate(books=10000, loans=50000, seed=42)
+        env.cr.commit()
+
+    Autores, mutuários, categorias e estágios são poucos e criados pelo ORM;
+    livros e empréstimos são gravados com ``INSERT`` em lote e os campos
+    armazenados são recalculados uma única vez ao final. A popularidade dos
+    livros segue uma distribuição de Zipf e a mesma ``seed`` gera o mesmo
+    conjunto de dados.
+    """
+    _name = 'library.data.generator'
+    _description = 'Library Synthetic Data Generator'
+
+    @api.model
+    def generate(self, books=10000, loans=50000, authors=None, borrowers=None,
+                 categories=40, seed=42, zipf_s=1.1, history_days=730):
+        """Gera o conjunto de dados e devolve a contagem por tipo de registro.
+
+        Args:
+            books: number of books
+            loans: number of loans, spread over the last ``history_days`` days
+            authors: number of authors (default: books / 10)
+            borrowers: number of borrowers (default: loans / 20)
+            categories: number of categories, in a two-level hierarchy
+            seed: random seed; the same seed yields the same dataset
+            zipf_s: Zipf exponent of the book popularity
+        """
+        if not self.env.is_superuser() and not self.env.user.has_group('base.group_system'):
+            raise AccessError("Only administrators can generate test data.")
+        start = time.perf_counter()
+        rng = random.Random(seed)
+        authors = authors or max(1, books // 10)
+        borrowers = borrowers or max(1, loans // 20)
+        self.env.flush_all()
+        self.env.cr.execute("SELECT COALESCE(MAX(id), 0) FROM library_book")
+        tag = f"G{seed}-{self.env.cr.fetchone()[0]}"
+
+        Partner = self.env['res.partner'].with_context(tracking_disable=True)
+        author_ids = Partner.create([
+            {'name': f'{tag} Author {i}', 'is_author': True} for i in range(authors)
+        ]).ids
+        borrower_ids = Partner.create([
+            {'name': f'{tag} Borrower {i}'} for i in range(borrowers)
+        ]).ids
+        category_ids = self._generate_categories(tag, categories)
+        stage_ids = self._generate_stages()
+
+        book_rows = self._insert_books(rng, tag, books, author_ids, category_ids, stage_ids)
+        loan_count = self._insert_loans(rng, loans, book_rows, borrower_ids, zipf_s, history_days)
+
+        self._recompute(
+            [book_id for book_id, __ in book_rows], author_ids, borrower_ids, category_ids,
+        )
+        counts = {
+            'authors': len(author_ids),
+            'borrowers': len(borrower_ids),
+            'categories': len(category_ids),
+            'books': len(book_rows),
+            'loans': loan_count,
+        }
+        _logger.info("Synthetic dataset %s generated in %.1fs: %s",
+                     tag, time.perf_counter() - start, counts)
+        return counts
+
+    @api.model
+    def _generate_categories(self, tag, count):
+        """Categorias em dois níveis (raízes e subcategorias); devolve os ids de todas."""
+        Category = self.env['library.book.category'].with_context(library_bulk_mode=True)
+        roots = Category.create([
+            {'name': f'{tag} Category {i}', 'code': f'{tag}-C{i}'}
+            for i in range(max(1, count // 5))
+        ])
+        children = Category.create([
+            {
+                'name': f'{tag} Category {roots[i % len(roots)].id}.{i}',
+                'code': f'{tag}-C{len(roots) + i}',
+                'parent_id': roots[i % len(roots)].id,
+            }
+            for i in range(count - len(roots))
+        ])
+        return (roots | children).ids
+
+    @api.model
+    def _generate_stages(self):
+        """Usa os estágios existentes, criando um conjunto mínimo se não houver."""
+        Stage = self.env['library.book.stage']
+        stages = Stage._get_ordered_stages()
+        if not stages:
+            stages = Stage.create([
+                {'name': 'Draft', 'code': 'draft', 'sequence': 10, 'is_default': True},
+                {'name': 'Available', 'code': 'available', 'sequence': 20},
+            ])
+        return stages.ids
+
+    @api.model
+    def _insert_books(self, rng, tag, count, author_ids, category_ids, stage_ids):
+        """Insere livros e suas categorias em lote; devolve ``[(id, cópias)]``."""
+        uid = self.env.uid
+        now = fields.Datetime.now()
+        today = fields.Date.today()
+        isbn_base = int(tag.rsplit('-', 1)[1]) * 10
+        rows = []
+        for offset in range(0, count, INSERT_PAGE_SIZE):
+            values = []
+            for i in range(offset, min(count, offset + INSERT_PAGE_SIZE)):
+                digits = f'979{(isbn_base + i) % 10 ** 9:09d}'
+                isbn = digits + _isbn13_check_digit(digits)
+                values.append((
+                    f'{tag} Book {i}', isbn, isbn, True, rng.choice(author_ids),
+                    rng.choice(stage_ids), uid, rng.choices((1, 2, 3, 5), (60, 25, 10, 5))[0],
+                    rng.randint(60, 900), today - timedelta(days=rng.randint(0, 365 * 80)),
+                    0, uid, now, uid, now,
+                ))
+            inserted = execute_values(self.env.cr._obj, """
+                INSERT INTO library_book (
+                    name, isbn, isbn_normalized, active, author_id, stage_id, user_id,
+                    total_copies, pages, date_published, color,
+                    create_uid, create_date, write_uid, write_date
+                ) VALUES %s
+                RETURNING id, total_copies
+            """, values, page_size=INSERT_PAGE_SIZE, fetch=True)
+            execute_values(self.env.cr._obj, """
+                INSERT INTO library_book_category_rel (book_id, category_id) VALUES %s
+                ON CONFLICT DO NOTHING
+            """, [
+                (book_id, category_id)
+                for book_id, __ in inserted
+                for category_id in rng.sample(category_ids, k=min(len(category_ids), rng.randint(1, 2)))
+            ], page_size=INSERT_PAGE_SIZE)
+            rows.extend(inserted)
+        return rows
+
+    @api.model
+    def _insert_loans(self, rng, count, book_rows, borrower_ids, zipf_s, history_days):
+        """Insere empréstimos em lote com popularidade de Zipf e datas realistas.
+
+        Empréstimos recentes ficam em andamento (alguns atrasados) enquanto houver
+        cópias livres; os antigos foram devolvidos (às vezes com atraso) ou perdidos.
+        """
+        uid = self.env.uid
+        now = fields.Datetime.now()
+        today = fields.Date.today()
+        # Livros embaralhados recebem pesos 1/rank^s (Zipf)
+        ranked = list(book_rows)
+        rng.shuffle(ranked)
+        cum_weights = list(itertools.accumulate(1 / rank ** zipf_s for rank in range(1, len(ranked) + 1)))
+        total_weight = cum_weights[-1]
+        # Cópias fora da estante (em andamento ou perdidas) por livro
+        out = {}
+        inserted = 0
+        for offset in range(0, count, INSERT_PAGE_SIZE):
+            values = []
+            for __ in range(offset, min(count, offset + INSERT_PAGE_SIZE)):
+                book_id, copies = ranked[bisect.bisect_left(cum_weights, rng.random() * total_weight)]
+                age = int(rng.triangular(0, history_days, 0))
+                loan_date = today - timedelta(days=age)
+                expected = loan_date + timedelta(days=14)
+                return_date = False
+                available = out.get(book_id, 0) < copies
+                if available and age <= 45 and rng.random() < 0.8:
+                    state = 'ongoing'
+                    out[book_id] = out.get(book_id, 0) + 1
+                elif available and rng.random() < 0.01:
+                    state = 'lost'
+                    out[book_id] = out.get(book_id, 0) + 1
+                else:
+                    state = 'done'
+                    return_date = min(today, loan_date + timedelta(days=int(rng.gammavariate(2, 6)) + 1))
+                duration = ((return_date or today) - loan_date).days
+                values.append((
+                    book_id, rng.choice(borrower_ids), loan_date, expected, return_date or None,
+                    state, 1, duration, state == 'ongoing' and expected < today,
+                    uid, now, uid, now,
+                ))
+            execute_values(self.env.cr._obj, """
+                INSERT INTO library_book_loan (
+                    book_id, partner_id, loan_date, expected_return_date, return_date,
+                    state, quantity, loan_duration, is_overdue,
+                    create_uid, create_date, write_uid, write_date
+                ) VALUES %s
+            """, values, page_size=INSERT_PAGE_SIZE)
+            inserted += len(values)
+            _logger.info("Synthetic dataset: %s/%s loans inserted", inserted, count)
+        return inserted
+
+    @api.model
+    def _recompute(self, book_ids, author_ids, borrower_ids, category_ids):
+        """Recalcula de uma vez os campos armazenados afetados pelos INSERTs."""
+        self.env.invalidate_all()
+        to_compute = [
+            (self.env['library.book'].browse(book_ids), None),
+            (self.env['library.book.category'].browse(category_ids), ['book_count', 'active_book_count']),
+            (self.env['res.partner'].browse(author_ids),
+             ['book_count', 'first_publication', 'last_publication', 'publication_span']),
+        ]
+        for records, fnames in to_compute:
+            for fname, field in records._fields.items():
+                if field.store and field.compute and not field.related \
+                        and (fnames is None or fname in fnames):
+                    self.env.add_to_compute(field, records)
+        self.env.flush_all()
+        self.env['library.borrower.stats']._refresh(borrower_ids)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+
+class LibraryBookHold(models.Model):
+    """Reserva de livro: fila FIFO por livro.
+
+    Quando cópias são liberadas (devolução, cancelamento ou expiração de uma
+    reserva, aumento do acervo), ``library.book._allocate_holds`` promove as
+    primeiras reservas de cada fila para ``ready`` com um único UPDATE para o
+    lote de livros, apoiado no índice (book_id, state, sequence); livros sem
+    fila não custam consultas extras. Reservas prontas e não retiradas até
+    ``expiry_date`` expiram em lote pelo cron.
+    """
+    _name = 'library.book.hold'
+    _description = 'Book Hold'
+    _inherit = ['library.bulk.mixin', 'mail.thread']
+    _order = 'sequence, id'
+
+    book_id = fields.Many2one(
+        comodel_name='library.book',
+        string='Book',
+        required=True,
+        ondelete='cascade',
+        tracking=True,
+    )
+    partner_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Borrower',
+        required=True,
+        domain=[('is_company', '=', False)],
+        ondelete='cascade',
+        index=True,
+        tracking=True,
+    )
+    sequence = fields.Integer(
+        string='Queue Order',
+        readonly=True,
+        copy=False,
+        help="Position key in the book queue (lower is served first)"
+    )
+    state = fields.Selection([
+        ('waiting', 'Waiting'),
+        ('ready', 'Ready for Pickup'),
+        ('done', 'Collected'),
+        ('expired', 'Expired'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='waiting', required=True, tracking=True)
+    request_date = fields.Date(string='Requested On', default=fields.Date.context_today, readonly=True)
+    ready_date = fields.Date(string='Ready On', readonly=True)
+    expiry_date = fields.Date(string='Pickup Deadline', readonly=True)
+    loan_id = fields.Many2one('library.book.loan', string='Loan', readonly=True, ondelete='set null')
+    queue_position = fields.Integer(string='Position in Queue', compute='_compute_queue_position')
+
+    def init(self):
+        """Fila por livro, prazo de retirada, última alteração e sequência de chegada."""
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS library_book_hold_queue_seq")
+        create_index(self.env.cr, 'library_book_hold_queue_idx', self._table,
+                     ['book_id', 'state', 'sequence'])
+        create_index(self.env.cr, 'library_book_hold_expiry_idx', self._table,
+                     ['expiry_date'], where="state = 'ready'")
+        create_index(self.env.cr, 'library_book_hold_write_date_idx', self._table,
+                     ['write_date'])
+
+    @api.constrains('book_id', 'partner_id', 'state')
+    def _check_single_active_hold(self):
+        """Um mutuário tem no máximo uma reserva ativa por livro."""
+        active = self.filtered(lambda h: h.state in ('waiting', 'ready'))
+        if not active:
+            return
+        groups = self._read_group(
+            [('book_id', 'in', active.book_id.ids),
+             ('partner_id', 'in', active.partner_id.ids),
+             ('state', 'in', ('waiting', 'ready'))],
+            ['book_id', 'partner_id'], ['__count'],
+        )
+        for book, partner, count in groups:
+            if count > 1:
+                raise ValidationError(f"{partner.name} already has an active hold on '{book.name}'.")
+
+    def _compute_queue_position(self):
+        """Posição na fila, calculada para o lote com uma única consulta."""
+        positions = {}
+        waiting = self.filtered(lambda h: h.state == 'waiting' and h._origin.id)
+        if waiting:
+            self.flush_model(['book_id', 'state', 'sequence'])
+            self.env.cr.execute("""
+                SELECT hold.id,
+                       (SELECT COUNT(*) FROM library_book_hold ahead
+                         WHERE ahead.book_id = hold.book_id
+                           AND ahead.state = 'waiting'
+                           AND (ahead.sequence, ahead.id) < (hold.sequence, hold.id)) + 1
+                  FROM library_book_hold hold
+                 WHERE hold.id IN %s
+            """, [tuple(waiting._origin.ids)])
+            positions = dict(self.env.cr.fetchall())
+        for hold in self:
+            hold.queue_position = positions.get(hold._origin.id, 0)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Entra no fim da fila e já tenta atender se houver cópia livre."""
+        pending = [vals for vals in vals_list if not vals.get('sequence')]
+        if pending:
+            self.env.cr.execute(
+                "SELECT nextval('library_book_hold_queue_seq') FROM generate_series(1, %s)",
+                [len(pending)],
+            )
+            for vals, (sequence,) in zip(pending, self.env.cr.fetchall()):
+                vals['sequence'] = sequence
+        holds = super().create(vals_list)
+        holds.filtered(lambda h: h.state == 'waiting').book_id._allocate_holds()
+        return holds
+
+    def action_cancel(self):
+        """Cancela reservas; cópias reservadas passam ao próximo da fila."""
+        self._release('cancelled')
+        return True
+
+    def _release(self, state):
+        """Encerra reservas ativas e realoca as cópias dos livros afetados."""
+        holds = self.filtered(lambda h: h.state in ('waiting', 'ready'))
+        if holds:
+            holds.write({'state': state})
+            holds.book_id._allocate_holds()
+        return holds
+
+    def action_collect(self):
+        """Retirada no balcão: cria os empréstimos das reservas prontas."""
+        holds = self.filtered(lambda h: h.state == 'ready')
+        if holds != self:
+            raise ValidationError("Only holds ready for pickup can be collected.")
+        today = fields.Date.context_today(self)
+        # As reservas saem de "ready" antes: a cópia separada para elas passa
+        # a contar como livre na verificação de disponibilidade dos empréstimos
+        holds.write({'state': 'done'})
+        loans = self.env['library.book.loan'].create([{
+            'book_id': hold.book_id.id,
+            'partner_id': hold.partner_id.id,
+            'loan_date': today,
+            'expected_return_date': today + timedelta(days=15),
+        } for hold in holds])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE library_book_hold hold
+               SET loan_id = link.loan_id
+              FROM (VALUES %s) AS link(hold_id, loan_id)
+             WHERE hold.id = link.hold_id
+            """,
+            SQL(", ").join(SQL("(%s, %s)", hold.id, loan.id) for hold, loan in zip(holds, loans)),
+        ))
+        holds.invalidate_recordset(['loan_id'])
+        return True
+
+    @api.model
+    def _cron_expire_holds(self):
+        """Expira em lote reservas não retiradas e atende os próximos da fila."""
+        self.flush_model(['state', 'expiry_date'])
+        self.env.cr.execute(SQL(
+            """
+            UPDATE library_book_hold
+               SET state = 'expired', write_uid = %s, write_date = NOW() AT TIME ZONE 'UTC'
+             WHERE state = 'ready' AND expiry_date < %s
+         RETURNING book_id
+            """,
+            self.env.uid, fields.Date.today(),
+        ))
+        books = self.env['library.book'].browse({book_id for book_id, in self.env.cr.fetchall()})
+        self.invalidate_model(['state', 'write_uid', 'write_date'])
+        # As cópias liberadas voltam ao acervo mesmo sem fila de espera
+        books._holds_modified()
+        books._allocate_holds()
+        _logger.info("Expired uncollected holds on %s book(s)", len(books))
+        return len(books)
@@ -1,20 +1,71 @@
 # -*- coding: utf-8 -*-
+import re
 from datetime import date, timedelta
 
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, html2plaintext
+from odoo.tools.sql import create_index, escape_psql
+
+from .perf_sample import profile_performance
+
+# Configurações de busca textual do PostgreSQL por idioma do usuário
+FTS_CONFIGS = {
+    'pt': 'portuguese',
+    'en': 'english',
+}
+FTS_DEFAULT_CONFIG = 'english'
+
+
+def normalize_isbn(code):
+    """Converte um código ISBN-10/ISBN-13 (com ou sem hífens) em ISBN-13.
+
+    Returns:
+        str: os 13 dígitos canônicos, ou ``False`` se o código for inválido
+        (tamanho, caracteres ou dígito verificador).
+    """
+    digits = re.sub(r'[\s-]', '', code or '').upper()
+    if re.fullmatch(r'\d{9}[\dX]', digits):
+        values = [10 if char == 'X' else int(char) for char in digits]
+        if sum((10 - index) * value for index, value in enumerate(values)) % 11:
+            return False
+        digits = '978' + digits[:9]
+        return digits + _isbn13_check_digit(digits)
+    if re.fullmatch(r'\d{13}', digits) and _isbn13_check_digit(digits[:12]) == digits[12]:
+        return digits
+    return False
+
+
+def _isbn13_check_digit(digits):
+    """Dígito verificador do ISBN-13 para os 12 primeiros dígitos."""
+    total = sum(int(char) * (3 if index % 2 else 1) for index, char in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
 
 class LibraryBook(models.Model):
     _name = 'library.book'
     _description = 'Library Book'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['library.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
     _order = 'name'
+    _rec_names_search = ['name', 'isbn']
 
     # Campos principais
-    name = fields.Char(string='Title', required=True, tracking=True)
-    isbn = fields.Char(string='ISBN', index=True, tracking=True)
+    name = fields.Char(string='Title', required=True, index='trigram', tracking=True)
+    isbn = fields.Char(string='ISBN', index='trigram', tracking=True)
+    isbn_normalized = fields.Char(
+        string='ISBN-13',
+        compute='_compute_isbn_normalized',
+        store=True,
+        index=True,
+        copy=False,
+        help="Canonical ISBN-13 (digits only) used for duplicate detection and barcode lookups"
+    )
     pages = fields.Integer(string='Number of Pages', tracking=True)
-    cover = fields.Binary(string='Cover Image', attachment=True)
+    # Capa: original limitada a 1024px e variantes reduzidas para kanban/listas
+    cover = fields.Image(string='Cover Image', max_width=1024, max_height=1024)
+    cover_256 = fields.Image(
+        string='Cover 256', related='cover', max_width=256, max_height=256, store=True)
+    cover_128 = fields.Image(
+        string='Cover 128', related='cover', max_width=128, max_height=128, store=True)
     description = fields.Html(string='Description', tracking=True)
 
     # Relacionamentos
@@ -60,10 +111,26 @@ class LibraryBook(models.Model):
         inverse_name='book_id',
         string='Loans'
     )
+    archived_loan_ids = fields.One2many(
+        comodel_name='library.book.loan.archive',
+        inverse_name='book_id',
+        string='Archived Loans'
+    )
+    hold_ids = fields.One2many(
+        comodel_name='library.book.hold',
+        inverse_name='book_id',
+        string='Holds'
+    )
+    hold_count = fields.Integer(
+        string='Waiting Holds',
+        compute='_compute_hold_count',
+        help="Number of borrowers waiting in the hold queue"
+    )
     loan_count = fields.Integer(
         string='Loan Count',
         compute='_compute_loan_count',
-        store=True
+        store=True,
+        help="Number of loans of this book, archived loans included"
     )
     
     # Novo campo computado para status do livro
@@ -71,7 +138,7 @@ class LibraryBook(models.Model):
         ('available', 'Available'),
         ('borrowed', 'Borrowed'),
         ('lost', 'Lost'),
-    ], string='Book Status', compute='_compute_book_status', store=True, tracking=True)
+    ], string='Book Status', compute='_compute_availability', store=True, tracking=True)
 
     # Novo campo computado para data de retorno esperada
     expected_return_date = fields.Date(
@@ -96,40 +163,423 @@ class LibraryBook(models.Model):
         help="Number of copies currently loaned"
     )
 
+    # Busca textual (título, descrição sem HTML e autor)
+    search_document = fields.Text(
+        string='Search Document',
+        compute='_compute_search_document',
+        store=True,
+        help="Plain text (description without HTML and author name) indexed for full-text search"
+    )
+    search_text = fields.Char(
+        string='Full Text',
+        compute='_compute_search_text',
+        search='_search_search_text',
+        help="Full-text search over title, description and author"
+    )
+
     # Restrições de unicidade
     _sql_constraints = [
         ('isbn_unique', 'unique(isbn)', 'ISBN must be unique.'),
+        ('isbn_normalized_unique', 'unique(isbn_normalized)', 'ISBN must be unique.'),
     ]
 
+    def init(self):
+        """Cria o vetor de busca textual (pt_BR + en) e os índices de leitura.
+
+        ``search_vector`` é uma coluna gerada pelo PostgreSQL a partir do título
+        (peso A) e de ``search_document`` (peso B), sempre em sincronia com os
+        campos armazenados pelo ORM.
+        """
+        self.env.cr.execute("""
+            ALTER TABLE library_book
+            ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese', COALESCE(name, '')), 'A')
+                || setweight(to_tsvector('english', COALESCE(name, '')), 'A')
+                || setweight(to_tsvector('portuguese', COALESCE(search_document, '')), 'B')
+                || setweight(to_tsvector('english', COALESCE(search_document, '')), 'B')
+            ) STORED
+        """)
+        create_index(self.env.cr, 'library_book_search_vector_idx', self._table,
+                     ['search_vector'], method='gin')
+        # Paginação por chave (keyset) do catálogo público, na ordem de ``_order``
+        create_index(self.env.cr, 'library_book_name_id_idx', self._table,
+                     ['name', 'id'], where='active')
+
     # Métodos computados
-    @api.depends('loan_ids')
+    @api.depends('description', 'author_id.name')
+    def _compute_search_document(self):
+        """Texto puro da descrição e nome do autor, base do vetor de busca."""
+        for book in self:
+            parts = [
+                html2plaintext(book.description) if book.description else '',
+                book.author_id.name or '',
+            ]
+            book.search_document = '\n'.join(part for part in parts if part) or False
+
+    @api.depends('isbn')
+    def _compute_isbn_normalized(self):
+        """ISBN-13 canônico: converte ISBN-10 e remove hífens."""
+        for book in self:
+            book.isbn_normalized = normalize_isbn(book.isbn)
+
+    def _compute_search_text(self):
+        self.search_text = False
+
+    @api.model
+    def _get_fts_config(self):
+        """Configuração de idioma do PostgreSQL para o idioma do usuário."""
+        lang = (self.env.lang or '').split('_')[0]
+        return FTS_CONFIGS.get(lang, FTS_DEFAULT_CONFIG)
+
+    @api.model
+    def _get_fts_query(self, text):
+        """Monta um tsquery por prefixo (``termo:*``) com todas as palavras do texto."""
+        words = re.findall(r'\w+', text or '')
+        return ' & '.join(f"{word}:*" for word in words)
+
+    @api.model
+    def _search_full_text_query(self, text, domain=None, limit=None):
+        """``Query`` dos livros que casam com ``text``, ordenada por relevância.
+
+        Returns:
+            Query: ou ``None`` quando o texto não gera termos de busca.
+        """
+        fts_query = self._get_fts_query(text)
+        if not fts_query:
+            return None
+        self.flush_model(['name', 'search_document'])
+        tsquery = SQL("to_tsquery(%s::regconfig, %s)", self._get_fts_config(), fts_query)
+        query = self._search(domain or [], limit=limit)
+        query.add_where(SQL("library_book.search_vector @@ %s", tsquery))
+        query.order = SQL(
+            "ts_rank(library_book.search_vector, %s) DESC, library_book.name, library_book.id",
+            tsquery,
+        )
+        return query
+
+    def _search_full_text_ids(self, text, domain=None, limit=None):
+        """Ids dos livros que casam com ``text``, ordenados por relevância."""
+        query = self._search_full_text_query(text, domain, limit)
+        if query is None:
+            return []
+        self.env.cr.execute(query.select())
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _search_search_text(self, operator, value):
+        """Filtro de busca textual usado pela visão de pesquisa.
+
+        Devolve a ``Query`` como subconsulta SQL: os ids nunca passam pelo
+        Python, qualquer que seja o número de livros encontrados.
+        """
+        if operator not in ('ilike', 'like', '=', '=ilike', '=like') or not isinstance(value, str):
+            raise ValidationError(f"Unsupported full-text search operator: {operator}")
+        query = self._search_full_text_query(value)
+        if query is None:
+            return [('id', 'in', [])]
+        # A ordem por relevância não vale dentro de um IN (SELECT ...)
+        query.order = None
+        return [('id', 'in', query)]
+
+    @api.depends('loan_ids', 'archived_loan_ids')
     def _compute_loan_count(self):
-        """Conta quantos empréstimos já foram feitos deste livro."""
+        """Conta quantos empréstimos já foram feitos deste livro (inclui o arquivo)."""
+        book_ids = self._origin.ids
+        counts = dict.fromkeys(book_ids, 0)
+        for model in ('library.book.loan', 'library.book.loan.archive'):
+            for book, count in self.env[model]._read_group(
+                [('book_id', 'in', book_ids)], ['book_id'], ['__count'],
+            ):
+                counts[book.id] += count
         for rec in self:
-            rec.loan_count = len(rec.loan_ids)
+            rec.loan_count = counts.get(rec._origin.id, 0)
+
+    def _get_loan_quantities(self):
+        """Soma as quantidades em empréstimo e perdidas de todo o recordset.
+
+        Uma única consulta agrupada sobre ``library_book_loan`` atende qualquer
+        quantidade de livros, em vez de percorrer ``loan_ids`` de cada um.
+
+        Returns:
+            dict: ``{book_id: (ongoing_qty, lost_qty)}`` para os livros com
+            empréstimos em andamento ou perdidos.
+        """
+        book_ids = [book_id for book_id in self._origin.ids if book_id]
+        if not book_ids:
+            return {}
+        self.env['library.book.loan'].flush_model(['book_id', 'state', 'quantity'])
+        self.env.cr.execute(self._loan_quantities_query(book_ids))
+        return {book_id: (ongoing, lost) for book_id, ongoing, lost in self.env.cr.fetchall()}
+
+    @api.model
+    def _loan_quantities_query(self, book_ids):
+        """Agregação de ``_get_loan_quantities``, servida pelo índice parcial
+        ``library_book_loan_book_open_idx`` (empréstimos em aberto)."""
+        return SQL(
+            """
+            SELECT book_id,
+                   COALESCE(SUM(quantity) FILTER (WHERE state = 'ongoing'), 0),
+                   COALESCE(SUM(quantity) FILTER (WHERE state = 'lost'), 0)
+              FROM library_book_loan
+             WHERE book_id IN %s
+               AND state IN ('ongoing', 'lost')
+          GROUP BY book_id
+            """,
+            tuple(book_ids),
+        )
+
+    @api.model
+    def _get_availability_timestamp(self, book_ids, isbns):
+        """Última alteração que pode mudar a disponibilidade dos livros pedidos.
+
+        Base do ETag/Last-Modified da API de disponibilidade (ver
+        ``controllers/main.py``): o ``write_date`` mais recente entre
+        empréstimos, reservas e os próprios livros, lido pelos índices de
+        ``write_date`` sem recalcular nada.
+
+        Returns:
+            datetime: o instante (UTC), ou ``None`` sem dados.
+        """
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT GREATEST(
+                (SELECT MAX(write_date) FROM library_book_loan),
+                (SELECT MAX(write_date) FROM library_book_hold),
+                (SELECT MAX(write_date) FROM library_book
+                  WHERE id = ANY(%s) OR isbn_normalized = ANY(%s))
+            )
+            """,
+            list(book_ids), list(isbns),
+        ))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_availability(self, book_ids, isbns):
+        """Disponibilidade de livros ativos por id ou ISBN-13, numa única consulta.
+
+        Lê os campos armazenados (``available_copies``, ``book_status``) e a
+        menor data prevista de devolução dos empréstimos em andamento.
+
+        Returns:
+            list: ``(id, isbn_normalized, available_copies, book_status,
+            expected_return_date)`` por livro encontrado.
+        """
+        self.flush_model(['active', 'isbn_normalized', 'available_copies', 'book_status'])
+        self.env['library.book.loan'].flush_model(['book_id', 'state', 'expected_return_date'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT book.id, book.isbn_normalized, book.available_copies, book.book_status,
+                   (SELECT MIN(loan.expected_return_date)
+                      FROM library_book_loan loan
+                     WHERE loan.book_id = book.id AND loan.state = 'ongoing')
+              FROM library_book book
+             WHERE book.active
+               AND (book.id = ANY(%s) OR book.isbn_normalized = ANY(%s))
+          ORDER BY book.id
+            """,
+            list(book_ids), list(isbns),
+        ))
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _catalogue_query(self, after=None, limit=500):
+        """Consulta de uma página do catálogo público, por chave ``(name, id)``.
+
+        A página seguinte começa depois da última chave lida, usando o índice
+        ``library_book_name_id_idx``: o custo de cada página não depende da
+        profundidade, ao contrário de ``OFFSET``.
+
+        Args:
+            after: ``(name, id)`` of the last book of the previous page
+            limit: page size
+
+        Returns:
+            SQL: ``id, name, isbn, author, categories, book_status, cover_version``
+            para até ``limit`` livros ativos; ``cover_version`` é nulo sem capa.
+        """
+        keyset = SQL("(book.name, book.id) > (%s, %s)", *after) if after else SQL("TRUE")
+        return SQL(
+            """
+            SELECT book.id, book.name, book.isbn, author.name,
+                   COALESCE(categ.names, '{}'),
+                   book.book_status,
+                   (SELECT EXTRACT(EPOCH FROM att.write_date)::bigint
+                      FROM ir_attachment att
+                     WHERE att.res_model = 'library.book' AND att.res_field = 'cover_128'
+                       AND att.res_id = book.id
+                     LIMIT 1)
+              FROM library_book book
+              LEFT JOIN res_partner author ON author.id = book.author_id
+              LEFT JOIN LATERAL (
+                    SELECT ARRAY_AGG(c.complete_name ORDER BY c.complete_name) AS names
+                      FROM library_book_category_rel rel
+                      JOIN library_book_category c ON c.id = rel.category_id
+                     WHERE rel.book_id = book.id
+              ) categ ON TRUE
+             WHERE book.active AND %s
+          ORDER BY book.name, book.id
+             LIMIT %s
+            """,
+            keyset, limit,
+        )
+
+    def _lock_for_checkout(self):
+        """Bloqueia as linhas dos livros até o fim da transação.
+
+        ``SELECT ... FOR UPDATE`` em ordem crescente de id serializa empréstimos
+        concorrentes do mesmo título (dois terminais emprestando a última cópia)
+        sem risco de deadlock entre lotes que envolvem os mesmos livros.
+        """
+        book_ids = sorted(set(self._origin.ids))
+        if book_ids:
+            self.env.cr.execute("""
+                SELECT id FROM library_book
+                 WHERE id IN %s
+              ORDER BY id
+                   FOR UPDATE
+            """, [tuple(book_ids)])
+
+    def _get_reserved_copies(self):
+        """Cópias separadas para reservas prontas (``ready``), por livro.
+
+        Returns:
+            dict: ``{book_id: copies}`` com uma única consulta agrupada.
+        """
+        book_ids = [book_id for book_id in self._origin.ids if book_id]
+        if not book_ids:
+            return {}
+        self.env['library.book.hold'].flush_model(['book_id', 'state'])
+        self.env.cr.execute("""
+            SELECT book_id, COUNT(*)
+              FROM library_book_hold
+             WHERE book_id IN %s AND state = 'ready'
+          GROUP BY book_id
+        """, [tuple(book_ids)])
+        return dict(self.env.cr.fetchall())
+
+    @api.depends('loan_ids.state', 'loan_ids.quantity', 'total_copies', 'hold_ids.state')
+    def _compute_availability(self):
+        """Calcula cópias em empréstimo, disponíveis e o status do livro.
 
-    @api.depends('loan_ids.state', 'loan_ids.quantity', 'total_copies')
-    def _compute_book_status(self):
-        """Determina o status atual do livro com base nos empréstimos."""
+        Os três campos compartilham o mesmo método para que o ORM os calcule
+        juntos a partir de uma única agregação (ver ``_get_loan_quantities``).
+        Cópias separadas para reservas prontas não ficam disponíveis.
+        """
+        quantities = self._get_loan_quantities()
+        reserved = self._get_reserved_copies()
         for book in self:
-            total_on_loan = sum(book.loan_ids.filtered(lambda l: l.state == 'ongoing').mapped('quantity'))
-            lost_copies = sum(book.loan_ids.filtered(lambda l: l.state == 'lost').mapped('quantity'))
-            available = book.total_copies - total_on_loan
-            
+            total_on_loan, lost_copies = quantities.get(book._origin.id, (0, 0))
+            available = book.total_copies - total_on_loan - reserved.get(book._origin.id, 0)
+            book.copies_on_loan = total_on_loan
+            book.available_copies = max(0, available)
+
             if lost_copies > 0 and available <= 0 and total_on_loan <= 0:
                 book.book_status = 'lost'
             elif available <= 0:
-                book.book_status = 'borrowed' 
+                book.book_status = 'borrowed'
             else:
                 book.book_status = 'available'
-    
-    @api.depends('loan_ids.state', 'loan_ids.quantity', 'total_copies')
-    def _compute_availability(self):
-        """Calcula disponibilidade de cópias baseada em empréstimos e total de cópias."""
+
+    @api.depends('hold_ids.state')
+    def _compute_hold_count(self):
+        """Conta as reservas em espera com um único agrupamento."""
+        counts = dict(self.env['library.book.hold']._read_group(
+            [('book_id', 'in', self._origin.ids), ('state', '=', 'waiting')],
+            ['book_id'], ['__count'],
+        ))
         for book in self:
-            total_on_loan = sum(book.loan_ids.filtered(lambda l: l.state == 'ongoing').mapped('quantity'))
-            book.copies_on_loan = total_on_loan
-            book.available_copies = max(0, book.total_copies - total_on_loan)
+            book.hold_count = counts.get(book._origin, 0)
+
+    def _allocate_holds(self, locked=False):
+        """Passa cópias livres aos primeiros da fila de reservas de cada livro.
+
+        Uma consulta separa os livros com reservas em espera; os demais saem
+        sem custo extra. Para os livros com fila, as cópias livres vêm das
+        mesmas agregações de ``_compute_availability`` e um único UPDATE
+        promove, em todos os livros de uma vez, as ``n`` primeiras reservas de
+        cada fila (``row_number()`` por livro). O bloqueio das linhas dos
+        livros serializa alocações concorrentes.
+
+        Args:
+            locked: as linhas dos livros já foram bloqueadas pelo chamador
+                (``_lock_for_checkout``), como em ``library.book.loan.write``.
+
+        Returns:
+            recordset: as reservas que ficaram prontas para retirada.
+        """
+        Hold = self.env['library.book.hold']
+        book_ids = [book_id for book_id in self._origin.ids if book_id]
+        if not book_ids:
+            return Hold
+        Hold.flush_model(['book_id', 'state'])
+        self.env.cr.execute("""
+            SELECT DISTINCT book_id
+              FROM library_book_hold
+             WHERE book_id IN %s AND state = 'waiting'
+        """, [tuple(book_ids)])
+        books = self.browse([book_id for book_id, in self.env.cr.fetchall()])
+        if not books:
+            return Hold
+        if not locked:
+            books._lock_for_checkout()
+        quantities = books._get_loan_quantities()
+        reserved = books._get_reserved_copies()
+        free = {}
+        for book in books:
+            # Mesma conta de ``available_copies`` (ver ``_compute_availability``)
+            on_loan = quantities.get(book.id, (0, 0))[0]
+            copies = book.total_copies - on_loan - reserved.get(book.id, 0)
+            if copies > 0:
+                free[book.id] = copies
+        if not free:
+            return Hold
+        pickup_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'library_app.hold_pickup_days', 3))
+        today = fields.Date.context_today(self)
+        self.env.cr.execute(SQL(
+            """
+            UPDATE library_book_hold hold
+               SET state = 'ready', ready_date = %s, expiry_date = %s,
+                   write_uid = %s, write_date = NOW() AT TIME ZONE 'UTC'
+              FROM (
+                    SELECT waiting.id, free.copies,
+                           row_number() OVER (
+                               PARTITION BY waiting.book_id ORDER BY waiting.sequence, waiting.id
+                           ) AS rank
+                      FROM library_book_hold waiting
+                      JOIN (VALUES %s) AS free(book_id, copies) ON free.book_id = waiting.book_id
+                     WHERE waiting.state = 'waiting'
+              ) queue
+             WHERE hold.id = queue.id AND queue.rank <= queue.copies
+         RETURNING hold.id
+            """,
+            today, today + timedelta(days=pickup_days), self.env.uid,
+            SQL(", ").join(SQL("(%s, %s)", book_id, copies) for book_id, copies in free.items()),
+        ))
+        ready_ids = [hold_id for hold_id, in self.env.cr.fetchall()]
+        ready = Hold.browse(ready_ids)
+        if ready:
+            Hold.invalidate_model(['state', 'ready_date', 'expiry_date', 'write_uid', 'write_date'])
+            ready.book_id._holds_modified()
+            if not self._in_bulk_mode():
+                for book, book_holds in ready.grouped('book_id').items():
+                    book.message_post(
+                        body=f"Hold ready for pickup until {book_holds[0].expiry_date}: "
+                             f"{', '.join(book_holds.partner_id.mapped('name'))}.",
+                        subtype_xmlid='mail.mt_note',
+                    )
+        return ready
+
+    def _holds_modified(self):
+        """Recalcula a disponibilidade após mudar reservas fora do ORM.
+
+        Os UPDATEs em lote de ``library_book_hold`` não disparam as
+        dependências de ``hold_ids.state``.
+        """
+        for fname in ('available_copies', 'copies_on_loan', 'book_status'):
+            self.env.add_to_compute(self._fields[fname], self)
+        self.invalidate_recordset(['hold_count'])
 
     @api.depends('loan_ids.expected_return_date', 'loan_ids.state')
     def _compute_expected_return_date(self):
@@ -144,10 +594,10 @@ class LibraryBook(models.Model):
     # Restrições e validações
     @api.constrains('isbn')
     def _check_isbn_format(self):
-        """ISBN deve ter 10 ou 13 caracteres."""
+        """ISBN deve ser um ISBN-10 ou ISBN-13 válido (hífens permitidos)."""
         for rec in self:
-            if rec.isbn and len(rec.isbn) not in (10, 13):
-                raise ValidationError('ISBN must be either 10 or 13 characters long.')
+            if rec.isbn and not normalize_isbn(rec.isbn):
+                raise ValidationError('ISBN must be a valid ISBN-10 or ISBN-13 (check digit included).')
 
     @api.constrains('pages')
     def _check_positive_pages(self):
@@ -158,12 +608,13 @@ class LibraryBook(models.Model):
 
     # Sobrescrevendo métodos padrão
     @api.model_create_multi
+    @profile_performance('library.book.create')
     def create(self, vals_list):
         """
         Define stage padrão para novos livros.
         """
-        default_stage = self.env['library.book.stage'].search([('is_default', '=', True)], limit=1)
-        
+        default_stage = self.env['library.book.stage']._get_default_stage()
+
         for vals in vals_list:
             # Configurações de estágio (biblioteca)
             if not vals.get('stage_id') and default_stage:
@@ -171,16 +622,21 @@ class LibraryBook(models.Model):
         
         return super().create(vals_list)
 
+    @profile_performance('library.book.write')
     def write(self, vals):
         """Sobrescreve o método write para adicionar lógica customizada.
 
         Além do rastreamento padrão por `tracking=True`, publicamos uma mensagem
         simples no chatter quando campos relevantes são alterados para garantir
-        visibilidade em testes e no histórico.
+        visibilidade em testes e no histórico. No modo em massa
+        (``library_bulk_mode``) vale apenas o resumo do lote.
         """
         tracked_fields = {'name', 'isbn', 'pages', 'description'}
-        will_post = any(f in vals for f in tracked_fields)
+        will_post = not self._in_bulk_mode() and any(f in vals for f in tracked_fields)
         res = super().write(vals)
+        if 'total_copies' in vals:
+            # Cópias novas no acervo atendem primeiro a fila de reservas
+            self._allocate_holds()
         if will_post:
             for rec in self:
                 try:
@@ -191,27 +647,201 @@ class LibraryBook(models.Model):
         return res
 
     def unlink(self):
-        """Impede a exclusão de livros com empréstimos ativos."""
-        books_with_active_loans = self.filtered(lambda b: b.loan_ids.filtered(lambda l: l.state == 'ongoing'))
-        if books_with_active_loans:
+        """Impede a exclusão de livros com empréstimos ativos.
+
+        As linhas dos livros são bloqueadas antes da verificação, para que um
+        empréstimo concorrente não seja excluído em cascata junto com o livro.
+        """
+        self._lock_for_checkout()
+        if self._get_borrowed_books():
             raise ValidationError(
                 "You cannot delete books that are currently borrowed. "
                 "Please return them first."
             )
         return super().unlink()
 
+    def _get_borrowed_books(self):
+        """Livros do recordset com empréstimos em andamento.
+
+        Um único ``EXISTS`` sobre a seleção inteira, apoiado no índice parcial
+        de empréstimos em aberto, em vez de percorrer ``loan_ids`` de cada livro.
+        """
+        book_ids = [book_id for book_id in self._origin.ids if book_id]
+        if not book_ids:
+            return self.browse()
+        self.env['library.book.loan'].flush_model(['book_id', 'state'])
+        self.env.cr.execute("""
+            SELECT book.id
+              FROM library_book book
+             WHERE book.id IN %s
+               AND EXISTS (
+                    SELECT 1 FROM library_book_loan loan
+                     WHERE loan.book_id = book.id AND loan.state = 'ongoing'
+               )
+        """, [tuple(book_ids)])
+        return self.browse(book_id for book_id, in self.env.cr.fetchall())
+
+    # Operações em massa (lista de livros)
+
+    def _bulk_apply(self, label, operation, check_loans=True):
+        """Aplica ``operation`` de uma vez aos livros liberados da seleção.
+
+        Os livros com empréstimos em andamento (quando ``check_loans``) ficam
+        de fora e são listados num único aviso de resumo. A seleção é
+        bloqueada (``_lock_for_checkout``) antes da verificação: empréstimos
+        concorrentes esperam o fim da operação em vez de escapar da checagem.
+
+        Args:
+            label: past participle used in the summary (e.g. "archived")
+            operation: callable receiving the allowed books, in bulk mode
+
+        Returns:
+            dict: client action notifying the result and reloading the view.
+        """
+        blocked = self.browse()
+        if check_loans:
+            self._lock_for_checkout()
+            blocked = self._get_borrowed_books()
+        allowed = (self - blocked).with_context(library_bulk_mode=True)
+        count = len(allowed)
+        if allowed:
+            operation(allowed)
+        message = f"{count} book(s) {label}."
+        if blocked:
+            names = ", ".join(blocked[:10].mapped('name'))
+            more = f" and {len(blocked) - 10} more" if len(blocked) > 10 else ""
+            message += f" {len(blocked)} skipped because they are on loan: {names}{more}."
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Books',
+                'message': message,
+                'type': 'warning' if blocked else 'success',
+                'sticky': bool(blocked),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            },
+        }
+
+    def action_bulk_archive(self):
+        """Arquiva (baixa do acervo) os livros sem empréstimos em andamento.
+
+        As reservas ativas dos livros arquivados são canceladas no mesmo lote.
+        """
+        def archive(books):
+            books.write({'active': False})
+            holds = self.env['library.book.hold'].search([
+                ('book_id', 'in', books.ids), ('state', 'in', ('waiting', 'ready')),
+            ])
+            holds.with_context(library_bulk_mode=True).write({'state': 'cancelled'})
+        return self._bulk_apply("archived", archive)
+
+    def action_bulk_unarchive(self):
+        """Restaura livros arquivados ao acervo."""
+        return self._bulk_apply("restored", lambda books: books.write({'active': True}), check_loans=False)
+
+    def action_bulk_delete(self):
+        """Exclui os livros sem empréstimos em andamento."""
+        return self._bulk_apply("deleted", lambda books: super(LibraryBook, books).unlink())
+
+    def action_bulk_set_stage(self, stage):
+        """Move para ``stage`` os livros sem empréstimos em andamento."""
+        return self._bulk_apply(
+            f"moved to {stage.name}", lambda books: books.write({'stage_id': stage.id}),
+        )
+
     @api.depends('name', 'isbn')
-    def name_get(self):
-        """Retorna uma representação amigável do livro (Título [ISBN])."""
-        result = []
+    def _compute_display_name(self):
+        """Representação amigável do livro: Título (ISBN)."""
         for book in self:
-            name = book.name
-            if book.isbn:
-                name = f"{name} ({book.isbn})"
-            result.append((book.id, name))
-        return result
+            book.display_name = f"{book.name} ({book.isbn})" if book.isbn else book.name
+
+    @api.model
+    def _search_display_name(self, operator, value):
+        """Busca por título ou ISBN, ambos cobertos por índices trigram."""
+        if operator in ('ilike', 'like', '=ilike', '=like') and isinstance(value, str) and value:
+            domain = ['|', ('name', operator, value), ('isbn', operator, value)]
+            isbn_key = normalize_isbn(value)
+            if isbn_key:
+                domain = ['|', ('isbn_normalized', '=', isbn_key)] + domain
+            return domain
+        return super()._search_display_name(operator, value)
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        """Typeahead indexado: prefixo, substring, busca textual e similaridade."""
+        if not name or operator not in ('ilike', 'like'):
+            return super().name_search(name, domain, operator, limit)
+        books = self.browse(self._search_typeahead_ids(name, domain, limit))
+        return [(book.id, book.display_name) for book in books.sudo()]
+
+    @api.model
+    def _search_typeahead_ids(self, text, domain=None, limit=None):
+        """Ids dos livros para o typeahead (ver ``_typeahead_query``)."""
+        self.flush_model(['name', 'isbn', 'isbn_normalized', 'search_document'])
+        self.env.cr.execute(self._typeahead_query(text, domain, limit).select())
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _typeahead_query(self, text, domain=None, limit=None):
+        """Consulta única e indexada do typeahead de livros.
+
+        Combina substring no título e ISBN e similaridade (operador ``%`` do
+        pg_trgm), servidos pelos índices GIN trigram, com a busca textual
+        (``search_vector``). Ordena prefixos primeiro e depois pela maior entre
+        similaridade e relevância textual.
+        """
+        pattern = escape_psql(text)
+        tsquery = SQL("to_tsquery(%s::regconfig, %s)", self._get_fts_config(), self._get_fts_query(text) or None)
+        isbn_key = normalize_isbn(text) or None
+        if self.env.registry.has_trigram:
+            fuzzy_match = SQL("OR library_book.name %% %s", text)
+            similarity = SQL("similarity(library_book.name, %s)", text)
+        else:
+            fuzzy_match, similarity = SQL(), SQL("0")
+        query = self._search(domain or [], limit=limit)
+        query.add_where(SQL(
+            """(
+                library_book.name ILIKE %s
+                OR library_book.isbn ILIKE %s
+                OR library_book.isbn_normalized = %s
+                OR library_book.search_vector @@ %s
+                %s
+            )""",
+            f'%{pattern}%', f'%{pattern}%', isbn_key, tsquery, fuzzy_match,
+        ))
+        query.order = SQL(
+            """library_book.name ILIKE %s DESC,
+               GREATEST(%s, ts_rank(library_book.search_vector, %s)) DESC,
+               library_book.name, library_book.id""",
+            f'{pattern}%', similarity, tsquery,
+        )
+        return query
+
+    @api.model
+    def lookup_isbns(self, codes):
+        """Resolve uma lista de códigos lidos (ISBN-10/13, com ou sem hífens).
+
+        Todos os códigos são normalizados e resolvidos com uma única consulta
+        sobre o índice de ``isbn_normalized``, incluindo livros arquivados.
+
+        Args:
+            codes: lista de códigos como lidos pelo scanner.
+
+        Returns:
+            dict: ``{código: book_id}``, com ``False`` para códigos inválidos
+            ou sem livro correspondente.
+        """
+        keys = {code: normalize_isbn(code) for code in codes}
+        books = self.with_context(active_test=False).search_fetch(
+            [('isbn_normalized', 'in', list({key for key in keys.values() if key}))],
+            ['isbn_normalized'],
+        )
+        book_by_key = {book.isbn_normalized: book.id for book in books}
+        return {code: book_by_key.get(key, False) for code, key in keys.items()}
 
     @api.model
+    @profile_performance('library.book.kanban_stages')
     def _read_group_stage_ids(self, stages, domain):
         """Expande os estágios para visualização Kanban.
         
@@ -222,8 +852,8 @@ class LibraryBook(models.Model):
         Returns:
             All available stages for kanban view display
         """
-        # Return all stages ordered by sequence
-        return self.env['library.book.stage'].search([], order='sequence, name')
+        # Todos os estágios, na ordem do kanban, vindos do cache de referência
+        return self.env['library.book.stage']._get_ordered_stages()
 
     # Métodos de ação
     def action_open_loans(self):
@@ -238,20 +868,44 @@ class LibraryBook(models.Model):
             'context': {'default_book_id': self.id},
         }
 
+    def action_place_hold(self):
+        """Abre a reserva do livro para um mutuário (fila FIFO)."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Place Hold - {self.name}',
+            'res_model': 'library.book.hold',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_book_id': self.id},
+        }
+
+    def action_open_holds(self):
+        """Abrir a fila de reservas deste livro."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': f'Holds for {self.name}',
+            'res_model': 'library.book.hold',
+            'view_mode': 'list,form',
+            'domain': [('book_id', '=', self.id)],
+            'context': {'default_book_id': self.id, 'search_default_active': 1},
+        }
+
     def action_mark_available(self):
         """Marcar o livro como disponível (finaliza empréstimos ativos)."""
         self.ensure_one()
         active_loans = self.loan_ids.filtered(lambda l: l.state == 'ongoing')
-        if active_loans:
-            active_loans.write({'state': 'done', 'return_date': fields.Date.today()})
+        active_loans._close_loans('done', {'return_date': fields.Date.today()})
         return True
 
+    @profile_performance('library.book.action_borrow_book')
     def action_borrow_book(self):
-        """Ação rápida para emprestar o livro."""
+        """Ação rápida para emprestar o livro (ou entrar na fila de reservas)."""
         self.ensure_one()
         if self.available_copies <= 0:
-            raise ValidationError(f"No copies available for borrowing. Available: {self.available_copies}, On loan: {self.copies_on_loan}")
-        
+            return self.action_place_hold()
+
         # Calcular data de retorno esperada (15 dias por padrão)
         expected_date = fields.Date.today() + timedelta(days=15)
         
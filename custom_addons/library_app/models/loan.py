@@ -1,12 +1,21 @@
 # -*- coding: utf-8 -*-
+import logging
+import threading
+from datetime import timedelta
+
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+
+from .perf_sample import profile_performance
+
+_logger = logging.getLogger(__name__)
 
 class LibraryBookLoan(models.Model):
     _name = 'library.book.loan'
     _description = 'Book Loan'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
-    _order = 'loan_date desc'
+    _inherit = ['library.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
+    _order = 'loan_date desc, id desc'
 
     book_id = fields.Many2one(
         comodel_name='library.book',
@@ -60,6 +69,29 @@ class LibraryBookLoan(models.Model):
         help="Detailed description of the loss or damage"
     )
 
+    def init(self):
+        """Índices das consultas mais frequentes sobre empréstimos.
+
+        - livro, apenas empréstimos em aberto: disponibilidade e bloqueio;
+        - (mutuário, estado): ações e métricas do parceiro;
+        - data prevista, apenas em andamento: filtros e varredura de atraso;
+        - id, apenas sem devolução: lotes da varredura noturna de atraso;
+        - data do empréstimo decrescente: ordem padrão das listas;
+        - ``write_date``: última alteração, validador da API de disponibilidade.
+        """
+        create_index(self.env.cr, 'library_book_loan_book_open_idx', self._table,
+                     ['book_id'], where="state IN ('ongoing', 'lost')")
+        create_index(self.env.cr, 'library_book_loan_partner_state_idx', self._table,
+                     ['partner_id', 'state'])
+        create_index(self.env.cr, 'library_book_loan_expected_ongoing_idx', self._table,
+                     ['expected_return_date'], where="state = 'ongoing'")
+        create_index(self.env.cr, 'library_book_loan_unreturned_id_idx', self._table,
+                     ['id'], where="return_date IS NULL")
+        create_index(self.env.cr, 'library_book_loan_loan_date_idx', self._table,
+                     ['loan_date DESC', 'id DESC'])
+        create_index(self.env.cr, 'library_book_loan_write_date_idx', self._table,
+                     ['write_date'])
+
     @api.constrains('partner_id')
     def _check_borrower(self):
         """Valida que o mutuário foi selecionado."""
@@ -76,36 +108,68 @@ class LibraryBookLoan(models.Model):
     
     @api.constrains('book_id', 'state', 'quantity')
     def _check_availability(self):
-        """Garante que não se empreste mais cópias do que disponível."""
-        for loan in self:
-            if loan.state == 'ongoing' and loan.book_id and loan.quantity:
-                # Calcular total de cópias já emprestadas (excluindo este empréstimo)
-                other_loans = self.search([
-                    ('book_id', '=', loan.book_id.id),
-                    ('state', '=', 'ongoing'),
-                    ('id', '!=', loan.id)
-                ])
-                total_borrowed = sum(other_loans.mapped('quantity'))
-                
-                # Verificar se a quantidade solicitada excede a disponível
-                available_copies = loan.book_id.total_copies - total_borrowed
-                if loan.quantity > available_copies:
-                    raise ValidationError(
-                        f"Não é possível emprestar {loan.quantity} cópia(s) do livro '{loan.book_id.name}'. "
-                        f"Total de cópias: {loan.book_id.total_copies}, "
-                        f"Já emprestadas: {total_borrowed}, "
-                        f"Disponíveis: {available_copies}"
-                    )
+        """Garante que não se empreste mais cópias do que disponível.
+
+        Valida o lote inteiro com uma única consulta agrupada por livro; as
+        linhas dos livros já foram bloqueadas em ``create``/``write``. Cópias
+        separadas para reservas prontas não podem ser emprestadas a outros
+        (a retirada encerra as próprias reservas antes de criar os empréstimos,
+        ver ``library.book.hold.action_collect``).
+        """
+        ongoing_loans = self.filtered(lambda l: l.state == 'ongoing' and l.book_id and l.quantity)
+        if not ongoing_loans:
+            return
+        books = ongoing_loans.book_id
+        quantities = books._get_loan_quantities()
+        reserved = books._get_reserved_copies()
+        for book in books:
+            total_on_loan = quantities.get(book.id, (0, 0))[0]
+            book_reserved = reserved.get(book.id, 0)
+            if total_on_loan + book_reserved <= book.total_copies:
+                continue
+            requested = sum(ongoing_loans.filtered(lambda l: l.book_id == book).mapped('quantity'))
+            total_borrowed = total_on_loan - requested
+            available_copies = book.total_copies - total_borrowed - book_reserved
+            raise ValidationError(
+                f"Não é possível emprestar {requested} cópia(s) do livro '{book.name}'. "
+                f"Total de cópias: {book.total_copies}, "
+                f"Já emprestadas: {total_borrowed}, "
+                f"Reservadas: {book_reserved}, "
+                f"Disponíveis: {max(0, available_copies)}"
+            )
 
     @api.model_create_multi
+    @profile_performance('library.book.loan.create')
     def create(self, vals_list):
-        """Sobrescreve o método create para adicionar lógica de negócio."""
+        """Bloqueia os livros emprestados antes de criar o lote de empréstimos."""
+        book_ids = {
+            vals['book_id'] for vals in vals_list
+            if vals.get('book_id') and vals.get('state', 'ongoing') == 'ongoing'
+        }
+        self.env['library.book'].browse(book_ids)._lock_for_checkout()
         loans = super().create(vals_list)
+        self.env['library.borrower.stats']._refresh(loans.partner_id)
         return loans
 
+    @profile_performance('library.book.loan.write')
     def write(self, vals):
-        """Sobrescreve o método write para adicionar lógica de negócio."""
+        """Bloqueia os livros afetados quando a disponibilidade pode mudar.
+
+        Cópias liberadas (devolução, perda, troca de livro ou quantidade)
+        passam em seguida às filas de reserva, com uma alocação por lote.
+        """
+        availability_changed = bool({'book_id', 'state', 'quantity'} & set(vals))
+        books = self.book_id
+        if availability_changed:
+            if vals.get('book_id'):
+                books |= self.env['library.book'].browse(vals['book_id'])
+            books._lock_for_checkout()
+        partners = self.partner_id
         result = super().write(vals)
+        if availability_changed:
+            books._allocate_holds(locked=True)
+        if {'partner_id', 'state', 'expected_return_date'} & set(vals):
+            self.env['library.borrower.stats']._refresh(partners | self.partner_id)
         return result
 
     def unlink(self):
@@ -113,20 +177,79 @@ class LibraryBookLoan(models.Model):
         for loan in self:
             if loan.state == 'ongoing':
                 raise ValidationError("Cannot delete an ongoing loan.")
-        return super().unlink()
+        partners = self.partner_id
+        result = super().unlink()
+        self.env['library.borrower.stats']._refresh(partners)
+        return result
 
+    @profile_performance('library.book.loan.action_return_book')
     def action_return_book(self):
-        """Ação para marcar um livro como devolvido."""
-        self.ensure_one()
-        self.write({
-            'state': 'done',
-            'return_date': fields.Date.today()
-        })
+        """Ação para marcar livros como devolvidos.
+
+        Aceita vários empréstimos (ex.: um carrinho inteiro no balcão de
+        devolução): ver ``_close_loans``.
+        """
+        self._close_loans('done', {'return_date': fields.Date.today()})
+        return True
         
     def action_lost_book(self):
-        """Ação para marcar um livro como perdido."""
-        self.ensure_one()
-        self.write({'state': 'lost'})
+        """Ação para marcar livros como perdidos (aceita vários empréstimos)."""
+        self._close_loans('lost')
+        return True
+
+    @api.model
+    def checkin_loans(self, loan_ids, state='done'):
+        """Ponto de entrada RPC para devolução/perda em lote.
+
+        Args:
+            loan_ids: ids dos empréstimos a encerrar.
+            state: ``'done'`` (devolvido) ou ``'lost'`` (perdido).
+
+        Returns:
+            dict: ids encerrados (``closed``) e ignorados por não estarem em
+            andamento (``skipped``).
+        """
+        if state not in ('done', 'lost'):
+            raise ValidationError(f"Invalid check-in state: {state}")
+        loans = self.browse(loan_ids).exists()
+        extra_vals = {'return_date': fields.Date.today()} if state == 'done' else {}
+        closed = loans._close_loans(state, extra_vals)
+        return {
+            'closed': closed.ids,
+            'skipped': (loans - closed).ids,
+        }
+
+    def _close_loans(self, state, extra_vals=None):
+        """Encerra os empréstimos em andamento do recordset numa única transação.
+
+        Um único ``write()`` (sem valores de rastreamento por empréstimo)
+        recalcula cada livro e cada mutuário uma só vez; em seguida é postada
+        uma mensagem de resumo por livro, em vez de uma por empréstimo (ou uma
+        só para o lote no modo ``library_bulk_mode``). Cópias devolvidas passam
+        às filas de reserva com uma alocação por livro (ver ``write``).
+
+        Returns:
+            recordset: os empréstimos efetivamente encerrados.
+        """
+        loans = self.filtered(lambda l: l.state == 'ongoing')
+        if not loans:
+            return loans
+        loans.with_context(tracking_disable=True).write(dict(extra_vals or {}, state=state))
+        if not loans._in_bulk_mode():
+            loans._post_checkin_summary(state)
+        return loans
+
+    def _post_checkin_summary(self, state):
+        """Posta no chatter de cada livro um resumo dos empréstimos encerrados."""
+        label = dict(self._fields['state'].selection)[state]
+        for book, book_loans in self.grouped('book_id').items():
+            borrowers = ", ".join(
+                f"{loan.partner_id.name} ({loan.quantity})" for loan in book_loans
+            )
+            book.message_post(
+                body=f"{label}: {sum(book_loans.mapped('quantity'))} cop(ies) in batch check-in - {borrowers}.",
+                subtype_xmlid='mail.mt_note',
+            )
 
     # Funções de Cômputo
     
@@ -167,4 +290,121 @@ class LibraryBookLoan(models.Model):
         string='Is Overdue?',
         compute='_compute_is_overdue',
         store=True,
-    )
\ No newline at end of file
+    )
+
+    # Tarefas agendadas
+
+    @api.model
+    def _cron_refresh_overdue(self, batch_size=5000):
+        """Atualiza ``is_overdue`` e ``loan_duration`` em massa.
+
+        Os dois campos dependem da data de hoje, mas o ORM só os recalcula
+        quando o estado ou as datas mudam. A varredura noturna corrige, em
+        lotes de ``batch_size`` linhas, apenas os empréstimos em aberto cujo
+        valor armazenado ficou defasado, e recalcula as métricas apenas dos
+        mutuários cujos empréstimos mudaram de situação de atraso.
+
+        Cada lote continua do último id processado, pelo índice parcial dos
+        empréstimos sem devolução, sem reler os lotes anteriores; o
+        ``write_date`` avança junto, para o validador da API de disponibilidade.
+        """
+        today = fields.Date.today()
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        self.flush_model(['state', 'loan_date', 'return_date', 'expected_return_date',
+                          'is_overdue', 'loan_duration'])
+        total = 0
+        last_id = 0
+        while True:
+            self.env.cr.execute("""
+                WITH stale AS (
+                    SELECT id, is_overdue AS was_overdue
+                      FROM library_book_loan
+                     WHERE return_date IS NULL
+                       AND id > %(after)s
+                       AND (
+                            is_overdue IS DISTINCT FROM (
+                                state = 'ongoing'
+                                AND expected_return_date IS NOT NULL
+                                AND expected_return_date < %(today)s
+                            )
+                            OR loan_duration IS DISTINCT FROM
+                                COALESCE(GREATEST(0, %(today)s - loan_date), 0)
+                       )
+                  ORDER BY id
+                     LIMIT %(limit)s
+                )
+                UPDATE library_book_loan loan
+                   SET is_overdue = (
+                           loan.state = 'ongoing'
+                           AND loan.expected_return_date IS NOT NULL
+                           AND loan.expected_return_date < %(today)s
+                       ),
+                       loan_duration = COALESCE(GREATEST(0, %(today)s - loan.loan_date), 0),
+                       write_uid = %(uid)s,
+                       write_date = NOW() AT TIME ZONE 'UTC'
+                  FROM stale
+                 WHERE loan.id = stale.id
+             RETURNING loan.id, loan.partner_id, loan.is_overdue IS DISTINCT FROM stale.was_overdue
+            """, {'today': today, 'limit': batch_size, 'after': last_id, 'uid': self.env.uid})
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            total += len(rows)
+            last_id = max(loan_id for loan_id, __, __ in rows)
+            self.invalidate_model(['is_overdue', 'loan_duration', 'write_uid', 'write_date'])
+            self.env['library.borrower.stats']._refresh(
+                {partner_id for __, partner_id, changed in rows if changed}
+            )
+            if auto_commit:
+                self.env.cr.commit()
+        _logger.info("Overdue sweep refreshed %s loan(s)", total)
+        return total
+
+    @api.model
+    def _cron_archive_loans(self, batch_size=1000):
+        """Move empréstimos devolvidos antigos para ``library.book.loan.archive``.
+
+        São arquivados os empréstimos ``done`` devolvidos (ou, sem data de
+        devolução, emprestados) há mais de ``library_app.loan_archive_days``
+        dias (padrão 365). Cada lote é copiado com um único ``create`` e
+        removido com um único ``unlink``, confirmado a cada lote.
+        """
+        days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'library_app.loan_archive_days', 365))
+        cutoff = fields.Date.today() - timedelta(days=days)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        domain = [
+            ('state', '=', 'done'),
+            '|', ('return_date', '<', cutoff),
+                 '&', ('return_date', '=', False), ('loan_date', '<', cutoff),
+        ]
+        Archive = self.env['library.book.loan.archive']
+        total = 0
+        while True:
+            loans = self.search_fetch(domain, [
+                'book_id', 'partner_id', 'loan_date', 'expected_return_date',
+                'return_date', 'quantity',
+            ], order='id', limit=batch_size)
+            if not loans:
+                break
+            Archive.create([{
+                'book_id': loan.book_id.id,
+                'partner_id': loan.partner_id.id,
+                'loan_date': loan.loan_date,
+                'expected_return_date': loan.expected_return_date,
+                'return_date': loan.return_date,
+                'quantity': loan.quantity,
+                'was_overdue': bool(
+                    loan.expected_return_date and loan.return_date
+                    and loan.return_date > loan.expected_return_date
+                ),
+            } for loan in loans])
+            loans.unlink()
+            total += len(loans)
+            self.env.flush_all()
+            if auto_commit:
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        _logger.info("Loan archiving moved %s loan(s)", total)
+        return total
+
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class LibraryBookLoanArchive(models.Model):
+    """Histórico compacto de empréstimos devolvidos há muito tempo.
+
+    Os empréstimos ``done`` mais antigos que ``library_app.loan_archive_days``
+    são movidos para cá em lotes por ``library.book.loan._cron_archive_loans``,
+    mantendo ``library_book_loan`` restrita ao conjunto de trabalho recente.
+    Sem chatter nem rastreamento: apenas as colunas necessárias ao histórico.
+    """
+    _name = 'library.book.loan.archive'
+    _description = 'Archived Book Loan'
+    _order = 'loan_date desc, id desc'
+
+    book_id = fields.Many2one(
+        comodel_name='library.book',
+        string='Book',
+        ondelete='cascade',
+        index=True,
+        required=True,
+        readonly=True,
+    )
+    partner_id = fields.Many2one(
+        comodel_name='res.partner',
+        string='Borrower',
+        ondelete='restrict',
+        index=True,
+        required=True,
+        readonly=True,
+    )
+    loan_date = fields.Date(string='Loan Date', required=True, readonly=True)
+    expected_return_date = fields.Date(string='Expected Return Date', readonly=True)
+    return_date = fields.Date(string='Return Date', readonly=True)
+    quantity = fields.Integer(string='Quantity', default=1, readonly=True)
+    was_overdue = fields.Boolean(
+        string='Returned Late',
+        readonly=True,
+        help="The book was returned after the expected return date"
+    )
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api
+from odoo.exceptions import AccessError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class LibraryLoanReport(models.Model):
+    """Análise de empréstimos servida por uma *materialized view*.
+
+    Uma linha por dia, categoria, autor, estágio e mutuário, agregando
+    empréstimos recentes e arquivados. Os painéis leem apenas a view, que é
+    recalculada (``REFRESH ... CONCURRENTLY``) pelo cron noturno ou sob
+    demanda, sem varrer as tabelas transacionais no horário de atendimento.
+
+    A categoria de cada livro é a primeira pela sequência, para que um
+    empréstimo seja contado uma única vez.
+    """
+    _name = 'library.loan.report'
+    _description = 'Library Loan Analysis'
+    _auto = False
+    _rec_name = 'date'
+    _order = 'date desc'
+
+    date = fields.Date(string='Loan Date', readonly=True)
+    category_id = fields.Many2one('library.book.category', string='Category', readonly=True)
+    author_id = fields.Many2one('res.partner', string='Author', readonly=True)
+    stage_id = fields.Many2one('library.book.stage', string='Stage', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Borrower', readonly=True)
+    loan_count = fields.Integer(string='Loans', readonly=True)
+    quantity = fields.Integer(string='Copies', readonly=True)
+    ongoing_count = fields.Integer(string='Ongoing Loans', readonly=True)
+    overdue_count = fields.Integer(string='Overdue Loans', readonly=True)
+    duration_total = fields.Integer(string='Total Duration (days)', readonly=True)
+    avg_duration = fields.Float(string='Average Duration (days)', aggregator='avg', readonly=True)
+    overdue_rate = fields.Float(string='Overdue Rate (%)', aggregator='avg', readonly=True)
+
+    def init(self):
+        """(Re)cria a materialized view e o índice único exigido pelo CONCURRENTLY."""
+        self.env.cr.execute(SQL("DROP MATERIALIZED VIEW IF EXISTS %s", SQL.identifier(self._table)))
+        self.env.cr.execute(SQL(
+            """
+            CREATE MATERIALIZED VIEW %(table)s AS
+            WITH loans AS (
+                SELECT loan.book_id, loan.partner_id, loan.loan_date, loan.state, loan.quantity,
+                       COALESCE(loan.loan_duration, 0) AS duration,
+                       COALESCE(loan.is_overdue, FALSE)
+                           OR COALESCE(loan.return_date > loan.expected_return_date, FALSE) AS late
+                  FROM library_book_loan loan
+                 UNION ALL
+                SELECT arch.book_id, arch.partner_id, arch.loan_date, 'done', arch.quantity,
+                       GREATEST(0, COALESCE(arch.return_date - arch.loan_date, 0)),
+                       COALESCE(arch.was_overdue, FALSE)
+                  FROM library_book_loan_archive arch
+            )
+            SELECT row_number() OVER () AS id,
+                   loans.loan_date AS date,
+                   categ.category_id,
+                   book.author_id,
+                   book.stage_id,
+                   loans.partner_id,
+                   COUNT(*) AS loan_count,
+                   SUM(loans.quantity) AS quantity,
+                   COUNT(*) FILTER (WHERE loans.state = 'ongoing') AS ongoing_count,
+                   COUNT(*) FILTER (WHERE loans.late) AS overdue_count,
+                   SUM(loans.duration) AS duration_total,
+                   AVG(loans.duration) AS avg_duration,
+                   100.0 * COUNT(*) FILTER (WHERE loans.late) / COUNT(*) AS overdue_rate
+              FROM loans
+              JOIN library_book book ON book.id = loans.book_id
+              LEFT JOIN LATERAL (
+                    SELECT rel.category_id
+                      FROM library_book_category_rel rel
+                      JOIN library_book_category c ON c.id = rel.category_id
+                     WHERE rel.book_id = book.id
+                  ORDER BY c.sequence, c.id
+                     LIMIT 1
+              ) categ ON TRUE
+          GROUP BY loans.loan_date, categ.category_id, book.author_id, book.stage_id, loans.partner_id
+            """,
+            table=SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE UNIQUE INDEX %s ON %s (id)",
+            SQL.identifier(f'{self._table}_id_idx'), SQL.identifier(self._table),
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX %s ON %s (date)",
+            SQL.identifier(f'{self._table}_date_idx'), SQL.identifier(self._table),
+        ))
+
+    def _read_group_select(self, aggregate_spec, query):
+        """Médias ponderadas pelo número de empréstimos, não pela quantidade de linhas."""
+        ratios = {
+            'avg_duration:avg': ('duration_total', 1),
+            'overdue_rate:avg': ('overdue_count', 100),
+        }
+        if aggregate_spec in ratios:
+            fname, factor = ratios[aggregate_spec]
+            return SQL(
+                "%s * SUM(%s)::float / NULLIF(SUM(%s), 0)",
+                factor,
+                SQL.identifier(self._table, fname),
+                SQL.identifier(self._table, 'loan_count'),
+            )
+        return super()._read_group_select(aggregate_spec, query)
+
+    @api.model
+    def _refresh(self):
+        """Recalcula a view sem bloquear as leituras dos painéis."""
+        for model in ('library.book.loan', 'library.book.loan.archive', 'library.book',
+                      'library.book.category'):
+            self.env[model].flush_model()
+        self.env.cr.execute(SQL(
+            "REFRESH MATERIALIZED VIEW CONCURRENTLY %s", SQL.identifier(self._table),
+        ))
+        self.invalidate_model()
+        _logger.info("Loan analysis report refreshed")
+
+    @api.model
+    def action_refresh(self):
+        """Atualização sob demanda, a partir do menu de relatórios (gerentes).
+
+        O recálculo varre as tabelas transacionais; fica restrito aos gerentes
+        para não concorrer com o atendimento.
+        """
+        if not self.env.user.has_group('library_app.group_library_manager'):
+            raise AccessError("Only library managers can refresh the loan analysis.")
+        self._refresh()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
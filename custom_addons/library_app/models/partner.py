@@ -1,6 +1,22 @@
 # -*- coding: utf-8 -*-
+import operator
+
 from odoo import models, fields, api
 
+from .perf_sample import profile_performance
+
+# Avalia se um parceiro sem linha de métricas (contadores zerados) atende ao filtro
+ZERO_MATCHES = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, values: value in values,
+    'not in': lambda value, values: value not in values,
+}
+
 class ResPartner(models.Model):
     _inherit = 'res.partner'
 
@@ -28,26 +44,44 @@ class ResPartner(models.Model):
         inverse_name='partner_id',
         string='Loans'
     )
+    archived_loan_ids = fields.One2many(
+        comodel_name='library.book.loan.archive',
+        inverse_name='partner_id',
+        string='Loan History'
+    )
+    loan_history_count = fields.Integer(
+        string="Total Loans",
+        compute='_compute_loan_history_count',
+        help="Number of loans of this borrower, archived loans included"
+    )
 
-    # Métricas de empréstimos
+    # Métricas de empréstimos (lidas de library.borrower.stats)
+    borrower_stats_ids = fields.One2many(
+        comodel_name='library.borrower.stats',
+        inverse_name='partner_id',
+        string='Borrower Statistics'
+    )
     active_loans_count = fields.Integer(
         string="Active Loans",
         compute='_compute_loan_metrics',
-        store=True,
+        search='_search_active_loans_count',
+        compute_sudo=True,
         help="Number of ongoing book loans"
     )
     
     overdue_loans_count = fields.Integer(
         string="Overdue Loans",
         compute='_compute_loan_metrics',
-        store=True,
+        search='_search_overdue_loans_count',
+        compute_sudo=True,
         help="Number of overdue book loans"
     )
     
     on_time_loans_count = fields.Integer(
         string="On Time Loans",
         compute='_compute_loan_metrics',
-        store=True,
+        search='_search_on_time_loans_count',
+        compute_sudo=True,
         help="Number of ongoing loans that are still on time"
     )
 
@@ -57,36 +91,91 @@ class ResPartner(models.Model):
         compute='_compute_author_metrics',
         store=True
     )
-    first_publication = fields.Char(string="First Publication")
-    last_publication = fields.Char(string="Last Publication")
+    first_publication = fields.Date(
+        string="First Publication",
+        compute='_compute_author_metrics',
+        store=True,
+        index=True
+    )
+    last_publication = fields.Date(
+        string="Last Publication",
+        compute='_compute_author_metrics',
+        store=True,
+        index=True
+    )
+    publication_span = fields.Integer(
+        string="Publication Span (years)",
+        compute='_compute_author_metrics',
+        store=True,
+        help="Years between the first and the last publication"
+    )
 
-    @api.depends('book_ids.date_published')
+    @api.depends('book_ids.date_published', 'book_ids.active')
     def _compute_author_metrics(self):
+        """Livros e datas de publicação dos autores, numa única agregação.
+
+        Um ``MIN/MAX/COUNT ... GROUP BY author_id`` sobre os livros ativos do
+        lote, sem carregar os livros; o ORM só recalcula os autores cujos
+        livros mudaram.
+        """
+        metrics = {}
+        if self._origin.ids:
+            metrics = {
+                author.id: (count, first, last)
+                for author, count, first, last in self.env['library.book']._read_group(
+                    [('author_id', 'in', self._origin.ids)],
+                    ['author_id'],
+                    ['__count', 'date_published:min', 'date_published:max'],
+                )
+            }
         for partner in self:
-            books = partner.book_ids
-            partner.book_count = len(books)
-            dates = sorted(d for d in books.mapped('date_published') if d)
-            if dates:
-                partner.first_publication = dates[0].strftime('%Y-%m-%d')
-                partner.last_publication = dates[-1].strftime('%Y-%m-%d')
-            else:
-                partner.first_publication = False
-                partner.last_publication = False
-
-    @api.depends('loan_ids.state', 'loan_ids.is_overdue')
+            count, first, last = metrics.get(partner._origin.id, (0, False, False))
+            partner.book_count = count
+            partner.first_publication = first
+            partner.last_publication = last
+            partner.publication_span = (last.year - first.year) if first and last else 0
+
+    @api.depends('loan_ids', 'archived_loan_ids')
+    @profile_performance('res.partner.loan_history_count')
+    def _compute_loan_history_count(self):
+        """Total de empréstimos, somando os recentes e os arquivados."""
+        partner_ids = self._origin.ids
+        counts = dict.fromkeys(partner_ids, 0)
+        for model in ('library.book.loan', 'library.book.loan.archive'):
+            for partner, count in self.env[model]._read_group(
+                [('partner_id', 'in', partner_ids)], ['partner_id'], ['__count'],
+            ):
+                counts[partner.id] += count
+        for partner in self:
+            partner.loan_history_count = counts.get(partner._origin.id, 0)
+
+    @api.depends('borrower_stats_ids.active_loans_count',
+                 'borrower_stats_ids.overdue_loans_count',
+                 'borrower_stats_ids.on_time_loans_count')
+    @profile_performance('res.partner.loan_metrics')
     def _compute_loan_metrics(self):
-        """Computes loan metrics for borrowers."""
+        """Lê as métricas de empréstimo da tabela library.borrower.stats."""
         for partner in self:
-            # Filtrar empréstimos ativos
-            active_loans = partner.loan_ids.filtered(lambda l: l.state == 'ongoing')
-            partner.active_loans_count = len(active_loans)
-            
-            # Filtrar empréstimos em atraso
-            overdue_loans = active_loans.filtered(lambda l: l.is_overdue)
-            partner.overdue_loans_count = len(overdue_loans)
-            
-            # Empréstimos em dia (ativos mas não em atraso)
-            partner.on_time_loans_count = partner.active_loans_count - partner.overdue_loans_count
+            stats = partner.borrower_stats_ids[:1]
+            partner.active_loans_count = stats.active_loans_count
+            partner.overdue_loans_count = stats.overdue_loans_count
+            partner.on_time_loans_count = stats.on_time_loans_count
+
+    def _search_borrower_stats(self, field_name, operator, value):
+        """Traduz filtros sobre as métricas em um domínio sobre library.borrower.stats."""
+        domain = [('borrower_stats_ids', 'any', [(field_name, operator, value)])]
+        if operator in ZERO_MATCHES and ZERO_MATCHES[operator](0, value):
+            domain = ['|', ('borrower_stats_ids', '=', False)] + domain
+        return domain
+
+    def _search_active_loans_count(self, operator, value):
+        return self._search_borrower_stats('active_loans_count', operator, value)
+
+    def _search_overdue_loans_count(self, operator, value):
+        return self._search_borrower_stats('overdue_loans_count', operator, value)
+
+    def _search_on_time_loans_count(self, operator, value):
+        return self._search_borrower_stats('on_time_loans_count', operator, value)
 
     def toggle_author_status(self):
         """Marca/desmarca como autor."""
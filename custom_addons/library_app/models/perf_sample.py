@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+import functools
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Parâmetros de sistema da instrumentação (ver PERFORMANCE.md)
+PERF_ENABLED_PARAM = 'library_app.perf_instrumentation'
+PERF_BUDGET_QUERIES_PARAM = 'library_app.perf_budget_queries'
+PERF_BUDGET_MS_PARAM = 'library_app.perf_budget_ms'
+PERF_RETENTION_PARAM = 'library_app.perf_retention_days'
+
+
+def profile_performance(key):
+    """Mede consultas SQL, tempo de SQL e tempo total do método decorado.
+
+    Desligado por padrão: só mede quando ``library_app.perf_instrumentation``
+    está ativo (o parâmetro fica no ormcache, então o custo desligado é nulo).
+    Cada chamada, inclusive as que levantam exceção (marcadas como
+    ``failed``), vira uma linha de ``library.perf.sample`` e gera um aviso no
+    log quando passa dos orçamentos configurados. Deve ser o decorador mais
+    interno, logo acima do ``def``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            params = self.env['ir.config_parameter'].sudo()
+            if not params.get_param(PERF_ENABLED_PARAM):
+                return method(self, *args, **kwargs)
+            thread = threading.current_thread()
+            # Contadores mantidos pelo cursor (sql_db) nas threads HTTP
+            if not hasattr(thread, 'query_count'):
+                thread.query_count = 0
+                thread.query_time = 0
+            start_count, start_sql = thread.query_count, thread.query_time
+            start = time.perf_counter()
+            result = None
+            failed = True
+            try:
+                result = method(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                # Chamadas que falham também entram nos percentis
+                wall_ms = (time.perf_counter() - start) * 1000
+                record_count = len(self)
+                if not record_count and isinstance(result, models.BaseModel) and result._name == self._name:
+                    record_count = len(result)
+                self.env['library.perf.sample']._record(
+                    key, self._name, record_count,
+                    thread.query_count - start_count,
+                    (thread.query_time - start_sql) * 1000,
+                    wall_ms,
+                    failed=failed,
+                )
+        return wrapper
+    return decorator
+
+
+class LibraryPerfSample(models.Model):
+    """Amostras da instrumentação de performance (janela móvel).
+
+    Gravadas com um único INSERT por chamada medida e removidas pelo cron
+    após ``library_app.perf_retention_days`` dias (padrão 7).
+    """
+    _name = 'library.perf.sample'
+    _description = 'Library Performance Sample'
+    _order = 'id desc'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Operation', required=True, index=True, readonly=True)
+    model = fields.Char(string='Model', readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True)
+    query_count = fields.Integer(string='SQL Queries', readonly=True)
+    query_time = fields.Float(string='SQL Time (ms)', readonly=True)
+    wall_time = fields.Float(string='Wall Time (ms)', readonly=True)
+    over_budget = fields.Boolean(string='Over Budget', readonly=True)
+    failed = fields.Boolean(string='Failed', readonly=True,
+                            help="The measured call raised an exception")
+    user_id = fields.Many2one('res.users', string='User', readonly=True)
+
+    @api.model
+    def _record(self, key, model, record_count, query_count, query_time, wall_time, failed=False):
+        """Grava uma amostra e avisa no log se o orçamento foi excedido.
+
+        Amostras de chamadas que falharam vão para outro cursor: a transação
+        corrente será desfeita (ou já está abortada) e levaria a amostra junto.
+        """
+        sample = (key, model, record_count, query_count, query_time, wall_time, failed)
+        if failed:
+            # Nada aqui pode mascarar a exceção original da chamada medida,
+            # nem a leitura dos orçamentos (falharia numa transação abortada)
+            try:
+                with self.env.registry.cursor() as cr:
+                    self.with_env(self.env(cr=cr))._insert_sample(*sample)
+            except Exception:
+                _logger.warning("Could not record the failed %s sample", key, exc_info=True)
+        elif getattr(self.env.cr, 'readonly', False):
+            # Rotas somente leitura (ex.: web_read_group): grava em outro cursor
+            with self.env.registry.cursor() as cr:
+                self.with_env(self.env(cr=cr))._insert_sample(*sample)
+        else:
+            self._insert_sample(*sample)
+
+    @api.model
+    def _insert_sample(self, key, model, record_count, query_count, query_time, wall_time, failed):
+        """Compara a amostra com os orçamentos e a grava com um único INSERT."""
+        params = self.env['ir.config_parameter'].sudo()
+        budget_queries = int(params.get_param(PERF_BUDGET_QUERIES_PARAM, 100))
+        budget_ms = float(params.get_param(PERF_BUDGET_MS_PARAM, 500))
+        over_budget = query_count > budget_queries or wall_time > budget_ms
+        if over_budget:
+            _logger.warning(
+                "%s on %s record(s) over budget: %s queries (budget %s), %.0f ms (budget %.0f ms)",
+                key, record_count, query_count, budget_queries, wall_time, budget_ms,
+            )
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO library_perf_sample (
+                key, model, record_count, query_count, query_time, wall_time, over_budget,
+                failed, user_id, create_uid, create_date, write_uid, write_date
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC')
+            """,
+            key, model, record_count, query_count, query_time, wall_time, over_budget,
+            failed, self.env.uid, self.env.uid, self.env.uid,
+        ))
+
+    @api.model
+    def _cron_purge(self):
+        """Remove as amostras mais antigas que a janela de retenção."""
+        days = int(self.env['ir.config_parameter'].sudo().get_param(PERF_RETENTION_PARAM, 7))
+        self.env.cr.execute(SQL(
+            "DELETE FROM library_perf_sample WHERE create_date < %s",
+            fields.Datetime.now() - timedelta(days=days),
+        ))
+        _logger.info("Purged %s performance sample(s)", self.env.cr.rowcount)
+        self.invalidate_model()
+
+
+class LibraryPerfSampleReport(models.Model):
+    """Percentis por operação, calculados pelo PostgreSQL sobre as amostras."""
+    _name = 'library.perf.sample.report'
+    _description = 'Library Performance Percentiles'
+    _auto = False
+    _order = 'wall_p95 desc'
+    _rec_name = 'key'
+
+    key = fields.Char(string='Operation', readonly=True)
+    sample_count = fields.Integer(string='Samples', readonly=True)
+    over_budget_count = fields.Integer(string='Over Budget', readonly=True)
+    failed_count = fields.Integer(string='Failed', readonly=True)
+    wall_p50 = fields.Float(string='Wall p50 (ms)', readonly=True)
+    wall_p95 = fields.Float(string='Wall p95 (ms)', readonly=True)
+    wall_p99 = fields.Float(string='Wall p99 (ms)', readonly=True)
+    wall_max = fields.Float(string='Wall Max (ms)', readonly=True)
+    sql_time_p95 = fields.Float(string='SQL Time p95 (ms)', readonly=True)
+    query_p50 = fields.Float(string='Queries p50', readonly=True)
+    query_p95 = fields.Float(string='Queries p95', readonly=True)
+    query_max = fields.Integer(string='Queries Max', readonly=True)
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL(
+            """
+            CREATE VIEW %s AS
+            SELECT MIN(id) AS id,
+                   key,
+                   COUNT(*) AS sample_count,
+                   COUNT(*) FILTER (WHERE over_budget) AS over_budget_count,
+                   COUNT(*) FILTER (WHERE failed) AS failed_count,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY wall_time) AS wall_p50,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY wall_time) AS wall_p95,
+                   percentile_cont(0.99) WITHIN GROUP (ORDER BY wall_time) AS wall_p99,
+                   MAX(wall_time) AS wall_max,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY query_time) AS sql_time_p95,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY query_count) AS query_p50,
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY query_count) AS query_p95,
+                   MAX(query_count) AS query_max
+              FROM library_perf_sample
+          GROUP BY key
+            """,
+            SQL.identifier(self._table),
+        ))
@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
 
 class LibraryBookStage(models.Model):
     _name = 'library.book.stage'
     _description = 'Book Stage'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['library.bulk.mixin', 'mail.thread', 'mail.activity.mixin']
     _order = 'sequence, name'
 
     # Identificação
@@ -51,19 +51,68 @@ class LibraryBookStage(models.Model):
 
     @api.constrains('is_default')
     def _check_only_one_default(self):
-        for stage in self:
-            if stage.is_default:
-                others = self.search([('is_default', '=', True), ('id', '!=', stage.id)])
-                if others:
-                    raise ValidationError("Only one stage can be the default.")
+        if any(self.mapped('is_default')):
+            if self.search_count([('is_default', '=', True)]) > 1:
+                raise ValidationError("Only one stage can be the default.")
+
+    # Cache de dados de referência (invalidado em create/write/unlink)
+    @api.model
+    @tools.ormcache()
+    def _get_stage_data(self):
+        """
+        Dados de referência dos estágios, lidos uma vez por registry:
+        id do estágio padrão, ids na ordem do kanban, nomes e estágios dobrados.
+        """
+        stages = self.sudo().search_fetch([], ['name', 'is_default', 'fold'], order='sequence, name')
+        return tools.frozendict({
+            'default_id': next((stage.id for stage in stages if stage.is_default), False),
+            'ordered_ids': tuple(stages.ids),
+            'names': tools.frozendict((stage.id, stage.name) for stage in stages),
+            'folded_ids': frozenset(stages.filtered('fold').ids),
+        })
+
+    @api.model
+    def _get_default_stage(self):
+        """Estágio padrão para novos livros (vazio se não houver)."""
+        return self.browse(self._get_stage_data()['default_id'])
+
+    @api.model
+    def _get_ordered_stages(self):
+        """Todos os estágios na ordem do kanban, com nome e dobra já em cache.
+
+        O agrupamento do kanban lê ``display_name`` e ``fold`` dos estágios
+        expandidos; preenchidos a partir do ormcache, não geram consultas.
+        """
+        data = self._get_stage_data()
+        stages = self.browse(data['ordered_ids'])
+        cache = self.env.cache
+        for fname, value_of in (
+            ('name', lambda stage: data['names'][stage.id]),
+            ('fold', lambda stage: stage.id in data['folded_ids']),
+        ):
+            field = self._fields[fname]
+            # Valores já em cache (inclusive alterações pendentes) prevalecem
+            missing = stages.filtered(lambda stage: not cache.contains(stage, field))
+            cache.update(missing, field, [value_of(stage) for stage in missing])
+        return stages
 
     @api.model_create_multi
     def create(self, vals_list):
         if any(vals.get('is_default') for vals in vals_list):
-            self.search([('is_default', '=', True)]).write({'is_default': False})
-        return super().create(vals_list)
+            self._get_default_stage().write({'is_default': False})
+        stages = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return stages
 
     def write(self, vals):
         if vals.get('is_default'):
-            self.search([('is_default', '=', True)]).write({'is_default': False})
-        return super().write(vals)
\ No newline at end of file
+            (self._get_default_stage() - self).write({'is_default': False})
+        res = super().write(vals)
+        if {'is_default', 'fold', 'sequence', 'name'} & vals.keys():
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
\ No newline at end of file
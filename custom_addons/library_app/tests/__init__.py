@@ -1,6 +1,18 @@
 # Library App Tests
 # Testing framework for the library management system
 
+from . import test_availability_api
+from . import test_book_bulk_actions
+from . import test_book_hold
+from . import test_book_import
+from . import test_bulk_mode
+from . import test_catalogue_api
+from . import test_data_generator
 from . import test_library_book
+from . import test_library_export
 from . import test_library_loan
-from . import test_partner_integration
\ No newline at end of file
+from . import test_loan_concurrency
+from . import test_loan_report
+from . import test_partner_integration
+from . import test_perf_sample
+from . import test_performance
\ No newline at end of file
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the batch availability HTTP API
+
+Checks the payload of /library/api/availability and its conditional
+caching: an unchanged poll gets a 304, a new loan changes the ETag.
+"""
+
+import json
+from datetime import date, timedelta
+
+from odoo.tests import tagged
+from odoo.tests.common import HttpCase
+
+URL = '/library/api/availability'
+
+
+@tagged('post_install', '-at_install')
+class TestAvailabilityApi(HttpCase):
+    """Test cases for the availability controller"""
+
+    def setUp(self):
+        """Set up two books, one of them on loan"""
+        super().setUp()
+        author = self.env['res.partner'].create({'name': 'API Author', 'is_author': True})
+        self.borrower = self.env['res.partner'].create({'name': 'API Borrower'})
+        self.books = self.env['library.book'].create([
+            {'name': 'API Book 1', 'isbn': '978-0-306-40615-7', 'author_id': author.id},
+            {'name': 'API Book 2', 'author_id': author.id, 'total_copies': 2},
+        ])
+        self.loan = self.env['library.book.loan'].create({
+            'book_id': self.books[0].id,
+            'partner_id': self.borrower.id,
+            'loan_date': date.today(),
+            'expected_return_date': date.today() + timedelta(days=7),
+        })
+        self.env.flush_all()
+
+    def _get(self, query, headers=None):
+        return self.url_open(f'{URL}?{query}', headers=headers)
+
+    def test_availability_by_id_and_isbn(self):
+        """Books are found by id or ISBN, unknown keys are reported"""
+        response = self._get(f'ids={self.books[1].id},0&isbns=0306406152,123')
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        by_id = {book['id']: book for book in payload['books']}
+        self.assertEqual(set(by_id), set(self.books.ids))
+        self.assertEqual(by_id[self.books[0].id]['available_copies'], 0)
+        self.assertEqual(by_id[self.books[0].id]['expected_return_date'],
+                         (date.today() + timedelta(days=7)).isoformat())
+        self.assertEqual(by_id[self.books[1].id]['book_status'], 'available')
+        self.assertEqual(payload['missing'], {'ids': [0], 'isbns': ['123']})
+
+    def test_post_body(self):
+        """Large key lists can be sent as a JSON body"""
+        response = self.url_open(URL, data=json.dumps({'ids': self.books.ids}),
+                                 headers={'Content-Type': 'application/json'})
+        self.assertEqual(len(response.json()['books']), 2)
+
+    def test_unchanged_poll_is_not_modified(self):
+        """A poll with the previous ETag gets a 304 until a loan changes"""
+        query = f'ids={self.books[0].id}'
+        first = self._get(query)
+        etag = first.headers['ETag']
+        self.assertTrue(first.headers.get('Last-Modified'))
+        self.assertEqual(self._get(query, {'If-None-Match': etag}).status_code, 304)
+
+        self.loan.action_return_book()
+        self.env.cr.execute(
+            "UPDATE library_book_loan SET write_date = write_date + interval '1 second' WHERE id = %s",
+            [self.loan.id],
+        )
+        response = self._get(query, {'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.json()['books'][0]['available_copies'], 1)
+
+    def test_invalid_request(self):
+        """Malformed ids are rejected with a 400"""
+        self.assertEqual(self._get('ids=abc').status_code, 400)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the bulk lifecycle actions of library.book
+
+Archive, restore, stage moves and deletes apply to the whole selection at
+once and skip the books that are on loan.
+"""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import TransactionCase
+
+
+class TestBookBulkActions(TransactionCase):
+    """Test cases for the bulk book actions"""
+
+    def setUp(self):
+        """Set up five books, the first one on loan"""
+        super().setUp()
+        self.Book = self.env['library.book']
+        author = self.env['res.partner'].create({'name': 'Bulk Author', 'is_author': True})
+        self.borrower = self.env['res.partner'].create({'name': 'Bulk Borrower'})
+        self.books = self.Book.create([
+            {'name': f'Weeded Book {i}', 'author_id': author.id} for i in range(5)
+        ])
+        self.env['library.book.loan'].create({
+            'book_id': self.books[0].id,
+            'partner_id': self.borrower.id,
+            'loan_date': date.today(),
+            'expected_return_date': date.today() + timedelta(days=14),
+        })
+        self.stage = self.env['library.book.stage'].create({'name': 'Withdrawn', 'code': 'withdrawn'})
+
+    def test_borrowed_books_found_in_one_query(self):
+        """A single query finds the borrowed books of the selection"""
+        self.env.flush_all()
+        with self.assertQueryCount(1):
+            borrowed = self.books._get_borrowed_books()
+        self.assertEqual(borrowed, self.books[0])
+
+    def test_bulk_archive_skips_borrowed(self):
+        """Archiving skips books on loan, reports them and cancels holds"""
+        hold = self.env['library.book.hold'].create({
+            'book_id': self.books[0].id, 'partner_id': self.borrower.id,
+        })
+        action = self.books.action_bulk_archive()
+        self.assertEqual(self.books.mapped('active'), [True, False, False, False, False])
+        self.assertEqual(action['params']['type'], 'warning')
+        self.assertIn('Weeded Book 0', action['params']['message'])
+        self.assertEqual(hold.state, 'waiting')
+
+        self.books[1:].action_bulk_unarchive()
+        self.assertTrue(all(self.books.mapped('active')))
+
+    def test_bulk_archive_cancels_holds(self):
+        """Active holds on archived books are cancelled"""
+        self.env['library.book.loan'].create({
+            'book_id': self.books[1].id,
+            'partner_id': self.borrower.id,
+        }).action_return_book()
+        hold = self.env['library.book.hold'].create({
+            'book_id': self.books[1].id, 'partner_id': self.borrower.id,
+        })
+        self.books[1].action_bulk_archive()
+        self.assertEqual(hold.state, 'cancelled')
+
+    def test_bulk_stage_move(self):
+        """The stage wizard moves the free books in one write"""
+        wizard = self.env['library.book.stage.move'].with_context(
+            active_ids=self.books.ids,
+        ).create({'stage_id': self.stage.id})
+        action = wizard.action_apply()
+        self.assertEqual((self.books - self.books[0]).stage_id, self.stage)
+        self.assertNotEqual(self.books[0].stage_id, self.stage)
+        self.assertIn('4 book(s) moved to Withdrawn', action['params']['message'])
+
+    def test_bulk_delete(self):
+        """Deleting skips borrowed books; plain unlink still refuses them"""
+        action = self.books.action_bulk_delete()
+        self.assertEqual(self.books.exists(), self.books[0])
+        self.assertEqual(action['params']['type'], 'warning')
+        with self.assertRaises(ValidationError):
+            self.books[0].unlink()
+
+    def test_bulk_delete_locks_before_check(self):
+        """The selection is locked before the borrowed-books check runs"""
+        Book = self.registry['library.book']
+        calls = []
+        lock, check = Book._lock_for_checkout, Book._get_borrowed_books
+
+        def record_lock(books):
+            calls.append('lock')
+            return lock(books)
+
+        def record_check(books):
+            calls.append('check')
+            return check(books)
+
+        with patch.object(Book, '_lock_for_checkout', record_lock), \
+                patch.object(Book, '_get_borrowed_books', record_check):
+            self.books.action_bulk_delete()
+        self.assertEqual(calls[:2], ['lock', 'check'])
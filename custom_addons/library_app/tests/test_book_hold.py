@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Library Book Hold Model
+
+Covers the FIFO hold queue: allocation of returned copies, the borrow
+fallback to a hold and the expiry of uncollected holds.
+"""
+
+from datetime import date, timedelta
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import TransactionCase
+
+
+class TestBookHold(TransactionCase):
+    """Test cases for library.book.hold model"""
+
+    def setUp(self):
+        """Set up a two-copy book fully on loan and a queue of borrowers"""
+        super().setUp()
+        self.Hold = self.env['library.book.hold']
+        self.Loan = self.env['library.book.loan']
+        author = self.env['res.partner'].create({'name': 'Hold Author', 'is_author': True})
+        self.book = self.env['library.book'].create({
+            'name': 'Hold Book',
+            'author_id': author.id,
+            'total_copies': 2,
+        })
+        self.borrowers = self.env['res.partner'].create([
+            {'name': f'Hold Borrower {i}'} for i in range(4)
+        ])
+        self.loans = self.Loan.create([{
+            'book_id': self.book.id,
+            'partner_id': self.borrowers[0].id,
+            'loan_date': date.today(),
+            'expected_return_date': date.today() + timedelta(days=14),
+        } for __ in range(2)])
+
+    def _place_holds(self, partners):
+        return self.Hold.create([
+            {'book_id': self.book.id, 'partner_id': partner.id} for partner in partners
+        ])
+
+    def test_holds_wait_while_no_copy_is_free(self):
+        """Holds on a fully borrowed book queue in arrival order"""
+        holds = self._place_holds(self.borrowers[1:])
+        self.assertEqual(set(holds.mapped('state')), {'waiting'})
+        self.assertEqual(holds.mapped('queue_position'), [1, 2, 3])
+        self.assertEqual(self.book.hold_count, 3)
+
+    def test_batch_return_serves_queue_in_order(self):
+        """Returned copies go to the oldest holds and stay reserved for them"""
+        holds = self._place_holds(self.borrowers[1:])
+        self.loans.action_return_book()
+        self.assertEqual(holds.mapped('state'), ['ready', 'ready', 'waiting'])
+        self.assertEqual(holds[0].expiry_date, date.today() + timedelta(days=3))
+        self.assertEqual(holds[2].queue_position, 1)
+        self.assertEqual(self.book.available_copies, 0)
+
+        holds[0].action_collect()
+        self.assertEqual(holds[0].state, 'done')
+        self.assertEqual(holds[0].loan_id.partner_id, self.borrowers[1])
+        self.assertEqual(self.book.copies_on_loan, 1)
+
+    def test_batch_return_serves_each_book_queue(self):
+        """One batch return promotes the head of every affected queue"""
+        other = self.env['library.book'].create({'name': 'Other Hold Book', 'total_copies': 1})
+        other_loan = self.Loan.create({'book_id': other.id, 'partner_id': self.borrowers[0].id})
+        holds = self._place_holds(self.borrowers[1:3])
+        other_holds = self.Hold.create([
+            {'book_id': other.id, 'partner_id': partner.id} for partner in self.borrowers[2:4]
+        ])
+        (self.loans[0] | other_loan).action_return_book()
+        self.assertEqual(holds.mapped('state'), ['ready', 'waiting'])
+        self.assertEqual(other_holds.mapped('state'), ['ready', 'waiting'])
+        self.assertEqual(other.available_copies, 0)
+
+    def test_cancel_passes_copy_to_next_hold(self):
+        """Cancelling a ready hold allocates its copy to the next in line"""
+        holds = self._place_holds(self.borrowers[1:])
+        self.loans[0].action_return_book()
+        self.assertEqual(holds.mapped('state'), ['ready', 'waiting', 'waiting'])
+        holds[0].action_cancel()
+        self.assertEqual(holds.mapped('state'), ['cancelled', 'ready', 'waiting'])
+
+    def test_expired_hold_reallocates(self):
+        """The expiry cron releases uncollected copies to the queue"""
+        holds = self._place_holds(self.borrowers[1:3])
+        self.loans[0].action_return_book()
+        holds[0].flush_recordset()
+        self.env.cr.execute(
+            "UPDATE library_book_hold SET expiry_date = %s WHERE id = %s",
+            [date.today() - timedelta(days=1), holds[0].id],
+        )
+        self.Hold.invalidate_model(['expiry_date'])
+        self.Hold._cron_expire_holds()
+        self.assertEqual(holds.mapped('state'), ['expired', 'ready'])
+
+    def test_expired_hold_without_queue_frees_copy(self):
+        """Expiring the only hold of a book makes its copy available again"""
+        hold = self._place_holds(self.borrowers[1])
+        self.loans[0].action_return_book()
+        self.assertEqual(hold.state, 'ready')
+        self.assertEqual(self.book.available_copies, 0)
+        hold.flush_recordset()
+        self.env.cr.execute(
+            "UPDATE library_book_hold SET expiry_date = %s WHERE id = %s",
+            [date.today() - timedelta(days=1), hold.id],
+        )
+        self.Hold.invalidate_model(['expiry_date'])
+        self.Hold._cron_expire_holds()
+        self.assertEqual(hold.state, 'expired')
+        self.assertEqual(self.book.available_copies, 1)
+        self.assertEqual(self.book.book_status, 'available')
+
+    def test_mark_available_serves_queue(self):
+        """Returning copies from the book form also allocates waiting holds"""
+        holds = self._place_holds(self.borrowers[1:3])
+        self.book.action_mark_available()
+        self.assertEqual(holds.mapped('state'), ['ready', 'ready'])
+
+    def test_collect_links_loans(self):
+        """Collecting several holds at once links each one to its own loan"""
+        holds = self._place_holds(self.borrowers[1:3])
+        self.loans.action_return_book()
+        holds.action_collect()
+        self.assertEqual(holds.mapped('state'), ['done', 'done'])
+        self.assertEqual(holds.loan_id.partner_id, self.borrowers[1:3])
+        self.assertEqual(holds[0].loan_id.partner_id, self.borrowers[1])
+
+    def test_ready_hold_blocks_walk_in_loan(self):
+        """A copy set aside for a ready hold cannot be lent to someone else"""
+        hold = self._place_holds(self.borrowers[1])
+        self.loans[0].action_return_book()
+        self.assertEqual(hold.state, 'ready')
+        with self.assertRaises(ValidationError):
+            self.Loan.create({'book_id': self.book.id, 'partner_id': self.borrowers[2].id})
+        hold.action_collect()
+        self.assertEqual(hold.loan_id.partner_id, self.borrowers[1])
+
+    def test_borrow_unavailable_book_offers_hold(self):
+        """Borrowing a book with no free copy opens the hold form"""
+        action = self.book.action_borrow_book()
+        self.assertEqual(action['res_model'], 'library.book.hold')
+        self.assertEqual(action['context']['default_book_id'], self.book.id)
+
+    def test_single_active_hold_per_borrower(self):
+        """A borrower cannot queue twice for the same book"""
+        self._place_holds(self.borrowers[1])
+        with self.assertRaises(ValidationError):
+            self._place_holds(self.borrowers[1])
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the streaming catalogue importer
+
+Covers CSV and JSON-lines parsing, per-chunk author/category resolution
+and resuming an interrupted import from the saved progress.
+"""
+
+import io
+import json
+from datetime import date
+
+from odoo.tests.common import TransactionCase
+from odoo.exceptions import ValidationError
+
+
+class TestBookImport(TransactionCase):
+    """Test cases for library.book.import"""
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.Import = self.env['library.book.import']
+        self.Book = self.env['library.book'].with_context(active_test=False)
+        self.existing_author = self.env['res.partner'].create({
+            'name': 'Import Author One',
+            'is_author': True,
+        })
+        self.csv_data = (
+            "name,isbn,pages,author,categories\n"
+            "Import Book 1,9780441013593,412,Import Author One,IMPFIC\n"
+            "Import Book 2,,100,Import Author Two,IMPFIC;IMPSF\n"
+            "Import Book 3,,,Import Author One,\n"
+            "Import Book 4,,50,,IMPSF\n"
+            "Import Book 5,,,Import Author Two,IMPFIC\n"
+        ).encode()
+
+    def test_csv_import_in_chunks(self):
+        """CSV rows are created in chunks with authors and categories resolved"""
+        count = self.Import.import_stream(io.BytesIO(self.csv_data), 'csv', chunk_size=2)
+        self.assertEqual(count, 5)
+
+        books = self.Book.search([('name', 'like', 'Import Book')], order='name')
+        self.assertEqual(len(books), 5)
+        self.assertEqual(books[0].author_id, self.existing_author)
+        self.assertEqual(books[0].pages, 412)
+        self.assertEqual(books[1].author_id, books[4].author_id)
+        self.assertTrue(books[1].author_id.is_author)
+        self.assertFalse(books[3].author_id)
+        self.assertEqual(sorted(books[1].category_ids.mapped('code')), ['IMPFIC', 'IMPSF'])
+        self.assertEqual(books[0].category_ids, books[4].category_ids)
+        self.assertEqual(
+            self.env['res.partner'].search_count([('name', '=', 'Import Author Two')]), 1,
+        )
+
+    def test_jsonl_import(self):
+        """JSON-lines rows accept category lists"""
+        lines = [
+            {'name': 'Import Json Book', 'author': 'Import Author One', 'categories': ['IMPJSON']},
+            {'name': 'Import Json Book 2', 'total_copies': 3},
+        ]
+        data = '\n'.join(json.dumps(line) for line in lines).encode()
+        self.assertEqual(self.Import.import_stream(io.BytesIO(data), 'jsonl'), 2)
+        book = self.Book.search([('name', '=', 'Import Json Book')])
+        self.assertEqual(book.category_ids.code, 'IMPJSON')
+        self.assertEqual(self.Book.search([('name', '=', 'Import Json Book 2')]).total_copies, 3)
+
+    def test_resume_from_progress(self):
+        """A job resumes after the rows recorded in its progress parameter"""
+        params = self.env['ir.config_parameter'].sudo()
+        params.set_param('library_app.book_import.test-job', '3')
+        count = self.Import.import_stream(
+            io.BytesIO(self.csv_data), 'csv', chunk_size=2, job_key='test-job',
+        )
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            self.Book.search([('name', 'like', 'Import Book')]).mapped('name'),
+            ['Import Book 4', 'Import Book 5'],
+        )
+        self.assertFalse(params.get_param('library_app.book_import.test-job'))
+
+    def test_missing_title(self):
+        """Rows without a title report their line number"""
+        data = b"name,isbn\nImport Book 1,\n,9780441013593\n"
+        with self.assertRaisesRegex(ValidationError, 'Line 2'):
+            self.Import.import_stream(io.BytesIO(data), 'csv')
+
+    def test_invalid_number(self):
+        """Non-numeric pages report their line number"""
+        data = b"name,pages\nImport Book 1,12\nImport Book 2,many\n"
+        with self.assertRaisesRegex(ValidationError, 'Line 2: pages'):
+            self.Import.import_stream(io.BytesIO(data), 'csv')
+
+    def test_categories_by_name_and_string(self):
+        """Category names resolve to existing categories; JSON strings are split"""
+        existing = self.env['library.book.category'].create({'name': 'IMPNAME', 'code': 'IMP-OTHER'})
+        lines = [
+            {'name': 'Import Json Book', 'categories': 'IMPNAME; IMPSTR'},
+        ]
+        data = '\n'.join(json.dumps(line) for line in lines).encode()
+        self.assertEqual(self.Import.import_stream(io.BytesIO(data), 'jsonl'), 1)
+        book = self.Book.search([('name', '=', 'Import Json Book')])
+        self.assertIn(existing, book.category_ids)
+        self.assertEqual(sorted(book.category_ids.mapped('code')), ['IMP-OTHER', 'IMPSTR'])
+
+    def test_invalid_categories(self):
+        """Categories that are neither a string nor a list report their line"""
+        data = json.dumps({'name': 'Import Json Book', 'categories': 3}).encode()
+        with self.assertRaisesRegex(ValidationError, 'Line 1: categories'):
+            self.Import.import_stream(io.BytesIO(data), 'jsonl')
+
+    def test_non_object_rows(self):
+        """JSON lines that are not objects report their line number"""
+        for value in ([1, 2], "x"):
+            data = b'{"name": "Import Json Book"}\n' + json.dumps(value).encode()
+            with self.assertRaisesRegex(ValidationError, 'Line 2: each row must be an object'):
+                self.Import.import_stream(io.BytesIO(data), 'jsonl')
+
+    def test_publication_dates(self):
+        """Publication dates are parsed per row and bad ones report their line"""
+        data = b"name,date_published\nImport Dated Book,1965-08-01\n"
+        self.assertEqual(self.Import.import_stream(io.BytesIO(data), 'csv'), 1)
+        book = self.Book.search([('name', '=', 'Import Dated Book')])
+        self.assertEqual(book.date_published, date(1965, 8, 1))
+
+        data = b"name,date_published\nImport Book 1,\nImport Book 2,01/08/1965\n"
+        with self.assertRaisesRegex(ValidationError, 'Line 2: date_published'):
+            self.Import.import_stream(io.BytesIO(data), 'csv')
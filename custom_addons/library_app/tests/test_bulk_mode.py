@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the library bulk-operation mode
+
+Compares the chatter rows and write time of a mass edit with and without
+the ``library_bulk_mode`` context key. Timings are logged as a benchmark.
+"""
+
+import logging
+import time
+
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestBulkMode(TransactionCase):
+    """Test cases for library.bulk.mixin"""
+
+    BATCH_SIZE = 50
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.Book = self.env['library.book']
+        self.plain_books = self.Book.create([
+            {'name': f'Plain Mode Book {i}'} for i in range(self.BATCH_SIZE)
+        ])
+        self.bulk_books = self.Book.with_context(library_bulk_mode=True).create([
+            {'name': f'Bulk Mode Book {i}'} for i in range(self.BATCH_SIZE)
+        ])
+        self._flush_tracking()
+
+    def _flush_tracking(self):
+        self.env.cr.precommit.run()
+        self.env.flush_all()
+
+    def _chatter_rows(self, books):
+        """Return the number of mail.message and mail.tracking.value rows of books"""
+        self.env.cr.execute("""
+            SELECT COUNT(DISTINCT msg.id), COUNT(tracking.id)
+              FROM mail_message msg
+              LEFT JOIN mail_tracking_value tracking ON tracking.mail_message_id = msg.id
+             WHERE msg.model = 'library.book'
+               AND msg.res_id IN %s
+        """, [tuple(books.ids)])
+        return self.env.cr.fetchone()
+
+    def _timed_write(self, books, vals):
+        before = self._chatter_rows(books)
+        start = time.perf_counter()
+        books.write(vals)
+        self._flush_tracking()
+        elapsed = time.perf_counter() - start
+        after = self._chatter_rows(books)
+        return elapsed, after[0] - before[0], after[1] - before[1]
+
+    def test_bulk_create_single_summary(self):
+        """Bulk creation logs one summary instead of one message per book"""
+        messages, tracking = self._chatter_rows(self.bulk_books)
+        self.assertEqual(messages, 1)
+        self.assertEqual(tracking, 0)
+        self.assertGreaterEqual(self._chatter_rows(self.plain_books)[0], self.BATCH_SIZE)
+
+    def test_bulk_write_savings(self):
+        """Bulk writes skip per-record posts and tracking values"""
+        vals = {'pages': 321, 'total_copies': 2}
+        plain_time, plain_messages, plain_tracking = self._timed_write(self.plain_books, vals)
+        bulk_time, bulk_messages, bulk_tracking = self._timed_write(
+            self.bulk_books.with_context(library_bulk_mode=True), vals,
+        )
+        _logger.info(
+            "Mass edit of %s books: %.3fs / %s messages / %s tracking values (plain) "
+            "vs %.3fs / %s messages / %s tracking values (bulk mode)",
+            self.BATCH_SIZE, plain_time, plain_messages, plain_tracking,
+            bulk_time, bulk_messages, bulk_tracking,
+        )
+        self.assertGreaterEqual(plain_messages, self.BATCH_SIZE)
+        self.assertGreaterEqual(plain_tracking, self.BATCH_SIZE)
+        self.assertEqual(bulk_messages, 1)
+        self.assertEqual(bulk_tracking, 0)
+        self.assertEqual(set(self.bulk_books.mapped('pages')), {321})
+
+    def test_bulk_checkin_single_summary(self):
+        """Batch check-in in bulk mode posts a single summary for the batch"""
+        borrower = self.env['res.partner'].create({'name': 'Bulk Borrower'})
+        books = self.bulk_books[:5]
+        loans = self.env['library.book.loan'].create([{
+            'book_id': book.id,
+            'partner_id': borrower.id,
+        } for book in books])
+        self._flush_tracking()
+        before = self._chatter_rows(books)[0]
+        Message = self.env['mail.message']
+        loan_domain = [('model', '=', 'library.book.loan'), ('res_id', 'in', loans.ids)]
+        before_ids = Message.search(loan_domain).ids
+
+        loans.with_context(library_bulk_mode=True).action_return_book()
+        self._flush_tracking()
+
+        self.assertEqual(set(loans.mapped('state')), {'done'})
+        # Nothing on the books, one summary on the first loan of the batch
+        self.assertEqual(self._chatter_rows(books)[0], before)
+        summaries = Message.search(loan_domain + [('id', 'not in', before_ids)])
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries.res_id, loans[0].id)
+        self.assertIn('Bulk update: 5', summaries.body)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the public catalogue HTTP API
+
+Crawls /library/api/catalogue page by page with the opaque keyset cursor
+and checks the NDJSON lines.
+"""
+
+import base64
+import io
+import json
+
+from PIL import Image
+
+from odoo.tests import tagged
+from odoo.tests.common import HttpCase
+
+from ..controllers.main import decode_cursor, encode_cursor
+
+URL = '/library/api/catalogue'
+
+
+@tagged('post_install', '-at_install')
+class TestCatalogueApi(HttpCase):
+    """Test cases for the catalogue controller"""
+
+    def setUp(self):
+        """Set up books sharing a title prefix, two of them with the same title"""
+        super().setUp()
+        author = self.env['res.partner'].create({'name': 'Keyset Author', 'is_author': True})
+        category = self.env['library.book.category'].create({'name': 'Keyset', 'code': 'KEYSET'})
+        self.books = self.env['library.book'].create([{
+            'name': f'Keyset Book {i // 2}',
+            'author_id': author.id,
+            'category_ids': [(6, 0, category.ids)],
+        } for i in range(5)])
+        self.env['library.book'].create({'name': 'Keyset Book Archived', 'active': False})
+        self.env.flush_all()
+
+    def _page(self, cursor, limit):
+        response = self.url_open(f'{URL}?cursor={cursor}&limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        return lines[:-1], lines[-1]['next_cursor']
+
+    def test_cursor_round_trip(self):
+        """The cursor is opaque but decodes to the last key"""
+        self.assertEqual(decode_cursor(encode_cursor('Título', 42)), ('Título', 42))
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_keyset_crawl(self):
+        """Pages follow (name, id) without gaps or duplicates, ties included"""
+        cursor, crawled = encode_cursor('Keyset Book', 0), []
+        while cursor:
+            books, cursor = self._page(cursor, 2)
+            crawled += [book for book in books if book['title'].startswith('Keyset Book')]
+            if any(not book['title'].startswith('Keyset Book') for book in books):
+                break
+        self.assertEqual([book['id'] for book in crawled], self.books.sorted(lambda b: (b.name, b.id)).ids)
+        self.assertEqual(crawled[0]['author'], 'Keyset Author')
+        self.assertEqual(crawled[0]['categories'], ['Keyset'])
+        self.assertIsNone(crawled[0]['thumbnail_url'])
+
+    def test_invalid_parameters(self):
+        """Malformed cursors and page sizes are rejected with a 400"""
+        self.assertEqual(self.url_open(f'{URL}?cursor=%%%').status_code, 400)
+        self.assertEqual(self.url_open(f'{URL}?limit=0').status_code, 400)
+
+    def test_thumbnail_public(self):
+        """Anonymous clients can fetch the thumbnail URL of the catalogue"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 600), 'blue').save(buffer, format='PNG')
+        self.books[0].cover = base64.b64encode(buffer.getvalue())
+        self.env.flush_all()
+        books, __ = self._page(encode_cursor('Keyset Book', 0), 1)
+        self.assertEqual(books[0]['id'], self.books[0].id)
+        response = self.url_open(books[0]['thumbnail_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'image/png')
+        self.assertEqual(max(Image.open(io.BytesIO(response.content)).size), 128)
+
+        self.books[0].active = False
+        self.env.flush_all()
+        self.assertEqual(self.url_open(books[0]['thumbnail_url']).status_code, 404)
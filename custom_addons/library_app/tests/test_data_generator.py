@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the synthetic dataset generator
+
+Generates a small dataset and checks counts, consistency of the stored
+fields recomputed after the bulk inserts, and the skewed popularity.
+"""
+
+from odoo.tests.common import TransactionCase
+
+
+class TestDataGenerator(TransactionCase):
+    """Test cases for library.data.generator"""
+
+    def test_generate_small_dataset(self):
+        """Generated books, loans and metrics are consistent"""
+        counts = self.env['library.data.generator'].generate(
+            books=60, loans=1500, authors=8, borrowers=40, categories=10, seed=7,
+        )
+        self.assertEqual(counts, {
+            'authors': 8, 'borrowers': 40, 'categories': 10, 'books': 60, 'loans': 1500,
+        })
+
+        Book = self.env['library.book']
+        books = Book.search([('name', '=like', 'G7-%')])
+        self.assertEqual(len(books), 60)
+        self.assertTrue(all(book.isbn_normalized == book.isbn for book in books))
+        self.assertEqual(sum(books.mapped('loan_count')), 1500)
+        for book in books:
+            quantities = book._get_loan_quantities().get(book.id, (0, 0))
+            self.assertEqual(book.copies_on_loan, quantities[0])
+            self.assertGreaterEqual(book.available_copies, 0)
+
+        # Popularidade de Zipf: o livro mais emprestado concentra muitos empréstimos
+        top = max(books.mapped('loan_count'))
+        self.assertGreater(top, 1500 / 60 * 3)
+
+        roots = self.env['library.book.category'].search([
+            ('code', '=like', 'G7-%'), ('parent_id', '=', False),
+        ])
+        self.assertEqual(len(roots), 2)
+        self.assertTrue(all(root.child_ids for root in roots))
+
+        borrowers = self.env['res.partner'].search([('name', '=like', 'G7-% Borrower %')])
+        ongoing = self.env['library.book.loan'].search_count([
+            ('partner_id', 'in', borrowers.ids), ('state', '=', 'ongoing'),
+        ])
+        self.assertEqual(sum(borrowers.mapped('active_loans_count')), ongoing)
@@ -6,8 +6,16 @@ This module contains unit tests for the library.book model,
 following the testing strategy outlined in TESTING_STRATEGY.md.
 """
 
+import base64
+import io
+
+from PIL import Image
+from psycopg2 import IntegrityError
+
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, mute_logger
+from odoo.tools.query import Query
 
 
 class TestLibraryBook(TransactionCase):
@@ -47,14 +55,14 @@ class TestLibraryBook(TransactionCase):
         """Test basic book creation"""
         book = self.Book.create({
             'name': 'Test Book',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'pages': 200,
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
         
         self.assertEqual(book.name, 'Test Book')
-        self.assertEqual(book.isbn, '1234567890123')
+        self.assertEqual(book.isbn, '1234567890128')
         self.assertEqual(book.pages, 200)
         self.assertEqual(book.author_id, self.test_author)
         self.assertIn(self.test_category, book.category_ids)
@@ -68,23 +76,30 @@ class TestLibraryBook(TransactionCase):
                 'author_id': self.test_author.id,
             })
 
+        with self.assertRaises(ValidationError):
+            self.Book.create({
+                'name': 'Test Book',
+                'isbn': '1234567890123',  # Invalid check digit
+                'author_id': self.test_author.id,
+            })
+
         # Valid 10-digit ISBN
         book_10 = self.Book.create({
             'name': 'Test Book 10',
-            'isbn': '1234567890',
+            'isbn': '123456789X',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
-        self.assertEqual(book_10.isbn, '1234567890')
+        self.assertEqual(book_10.isbn, '123456789X')
 
         # Valid 13-digit ISBN
         book_13 = self.Book.create({
             'name': 'Test Book 13',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
-        self.assertEqual(book_13.isbn, '1234567890123')
+        self.assertEqual(book_13.isbn, '1234567890128')
 
     def test_positive_pages_validation(self):
         """Test that pages must be a positive number"""
@@ -99,7 +114,7 @@ class TestLibraryBook(TransactionCase):
         """Test book status computation based on loans"""
         book = self.Book.create({
             'name': 'Test Book',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -144,7 +159,7 @@ class TestLibraryBook(TransactionCase):
         """Test book search functionality"""
         book1 = self.Book.create({
             'name': 'Test Python Programming Unique',
-            'isbn': '1111111111111',
+            'isbn': '1111111111116',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -170,7 +185,7 @@ class TestLibraryBook(TransactionCase):
         """Test the borrow book action"""
         book = self.Book.create({
             'name': 'Test Book',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -182,4 +197,217 @@ class TestLibraryBook(TransactionCase):
         self.assertEqual(action['res_model'], 'library.book.loan')
         self.assertEqual(action['view_mode'], 'form')
         self.assertEqual(action['target'], 'new')
-        self.assertEqual(action['context']['default_book_id'], book.id)
\ No newline at end of file
+        self.assertEqual(action['context']['default_book_id'], book.id)
+
+    def test_availability_single_grouped_query(self):
+        """Availability recompute costs the same queries for 1 or 20 books"""
+        borrower = self.Partner.create({'name': 'Test Borrower'})
+        books = self.Book.create([{
+            'name': f'Test Bulk Book {i}',
+            'total_copies': 3,
+        } for i in range(20)])
+        self.Loan.create([{
+            'book_id': book.id,
+            'partner_id': borrower.id,
+            'quantity': 2,
+        } for book in books])
+        books[-1].loan_ids.write({'state': 'lost'})
+
+        def count_queries(records):
+            self.env.flush_all()
+            records.invalidate_recordset(['copies_on_loan', 'available_copies', 'book_status'])
+            start = self.env.cr.sql_log_count
+            records._compute_availability()
+            return self.env.cr.sql_log_count - start
+
+        self.assertEqual(count_queries(books[:1]), count_queries(books))
+        self.assertEqual(books[0].copies_on_loan, 2)
+        self.assertEqual(books[0].available_copies, 1)
+        self.assertEqual(books[0].book_status, 'available')
+        self.assertEqual(books[-1].copies_on_loan, 0)
+        self.assertEqual(books[-1].available_copies, 3)
+
+    def test_full_text_search(self):
+        """Full-text search covers title, stripped description and author"""
+        title_match = self.Book.create({
+            'name': 'Test Wizard Chronicles',
+            'author_id': self.test_author.id,
+        })
+        description_match = self.Book.create({
+            'name': 'Test Mountain Tales',
+            'description': '<p>Old <b>wizards</b> living in the mountains</p>',
+        })
+        author = self.Partner.create({'name': 'Test Wizardly Writer', 'is_author': True})
+        author_match = self.Book.create({
+            'name': 'Test Unrelated Title',
+            'author_id': author.id,
+        })
+        self.assertNotIn('<b>', description_match.search_document)
+
+        # The filter stays a SQL subquery instead of a literal list of ids
+        [(__, __, subquery)] = self.Book._search_search_text('ilike', 'wizard')
+        self.assertIsInstance(subquery, Query)
+
+        books = self.Book.search([('search_text', 'ilike', 'wizard')])
+        self.assertIn(title_match, books)
+        self.assertIn(description_match, books)
+        self.assertIn(author_match, books)
+
+        # Title matches rank above description matches
+        result = [book_id for book_id, _name in self.Book.name_search('wizard', limit=10)]
+        self.assertLess(result.index(title_match.id), result.index(description_match.id))
+
+        # Author renames refresh the indexed document
+        author.name = 'Test Renamed Writer'
+        self.assertNotIn(author_match, self.Book.search([('search_text', 'ilike', 'wizardly')]))
+
+    def test_typeahead_search(self):
+        """name_search returns prefix, ISBN and fuzzy matches through indexes"""
+        messiah = self.Book.create({
+            'name': 'Test Dune Messiah',
+            'isbn': '9780441172696',
+        })
+        dune = self.Book.create({
+            'name': 'Test Dune',
+            'isbn': '9780441013593',
+        })
+        self.assertEqual(dune.display_name, 'Test Dune (9780441013593)')
+
+        result = [book_id for book_id, _name in self.Book.name_search('Test Dune', limit=10)]
+        self.assertEqual(result[:2], [dune.id, messiah.id])
+
+        result = self.Book.name_search('0441172', limit=10)
+        self.assertEqual([book_id for book_id, _name in result], [messiah.id])
+        self.assertEqual(self.Book.search([('display_name', 'ilike', '0441013')]), dune)
+
+        if self.env.registry.has_trigram:
+            result = [book_id for book_id, _name in self.Book.name_search('Test Dune Mesiah', limit=10)]
+            self.assertIn(messiah.id, result)
+
+    def test_typeahead_uses_indexes(self):
+        """The typeahead query plan never falls back to a sequential scan"""
+        if not self.env.registry.has_trigram:
+            self.skipTest("pg_trgm is required for the substring indexes")
+        self.Book.create({'name': 'Test Dune', 'isbn': '9780441013593'})
+        self.env.flush_all()
+        # A catalogue large enough for the planner to prefer the indexes
+        self.env.cr.execute("""
+            INSERT INTO library_book (name, isbn, active)
+            SELECT 'Test Seed ' || md5(n::text), LPAD(n::text, 13, '978'), TRUE
+              FROM generate_series(1, 20000) n
+        """)
+        self.env.cr.execute("ANALYZE library_book")
+        query = self.Book._typeahead_query('dune', limit=8)
+        self.env.cr.execute(SQL("EXPLAIN %s", query.select()))
+        plan = "\n".join(row[0] for row in self.env.cr.fetchall())
+        self.assertNotIn('Seq Scan on library_book', plan)
+
+    def test_isbn_normalization_and_lookup(self):
+        """ISBN-10 and hyphenated codes share one canonical ISBN-13"""
+        book = self.Book.create({
+            'name': 'Test Normalized Book',
+            'isbn': '85-359-0277-5',
+        })
+        self.assertEqual(book.isbn_normalized, '9788535902778')
+
+        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'):
+            self.Book.create({
+                'name': 'Test Duplicate Book',
+                'isbn': '978-85-359-0277-8',
+            })
+
+        codes = ['8535902775', '978-85-359-0277-8', '9780441013593', 'not-a-code']
+        self.env.flush_all()
+        start = self.env.cr.sql_log_count
+        result = self.Book.lookup_isbns(codes)
+        self.assertEqual(self.env.cr.sql_log_count - start, 1)
+        self.assertEqual(result, {
+            '8535902775': book.id,
+            '978-85-359-0277-8': book.id,
+            '9780441013593': False,
+            'not-a-code': False,
+        })
+
+    def test_cover_variants(self):
+        """Covers are capped at 1024px and get 256/128px thumbnails"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 3000), 'red').save(buffer, format='PNG')
+        book = self.Book.create({
+            'name': 'Test Cover Book',
+            'cover': base64.b64encode(buffer.getvalue()),
+        })
+
+        for field, size in (('cover', 1024), ('cover_256', 256), ('cover_128', 128)):
+            image = Image.open(io.BytesIO(base64.b64decode(book[field])))
+            self.assertEqual(max(image.size), size, field)
+
+    def test_category_subtree_counts(self):
+        """Category counts and child_of domains cover the whole subtree"""
+        fantasy = self.Category.create({
+            'name': 'Test Fantasy',
+            'code': 'TESTFAN',
+            'parent_id': self.test_category.id,
+        })
+        epic = self.Category.create({
+            'name': 'Test Epic',
+            'code': 'TESTEPIC',
+            'parent_id': fantasy.id,
+        })
+        self.assertEqual(epic.complete_name, 'Test Category / Test Fantasy / Test Epic')
+        self.assertEqual(epic.display_name, epic.complete_name)
+
+        book = self.Book.create({'name': 'Test Epic Book', 'category_ids': [(6, 0, [epic.id])]})
+        self.Book.create({'name': 'Test Shared Book', 'category_ids': [(6, 0, [self.test_category.id, fantasy.id])]})
+        archived = self.Book.create({'name': 'Test Archived Book', 'category_ids': [(6, 0, [fantasy.id])]})
+        archived.active = False
+        self.env.flush_all()
+
+        self.assertEqual((self.test_category.book_count, self.test_category.active_book_count), (3, 2))
+        self.assertEqual((fantasy.book_count, fantasy.active_book_count), (3, 2))
+        self.assertEqual((epic.book_count, epic.active_book_count), (1, 1))
+
+        domain = self.test_category.action_open_books()['domain']
+        self.assertEqual(len(self.Book.search(domain)), 2)
+
+        book.category_ids = [(5, 0, 0)]
+        self.env.flush_all()
+        self.assertEqual(self.test_category.book_count, 2)
+
+        fantasy.name = 'Test Fantasy Renamed'
+        self.assertEqual(epic.complete_name, 'Test Category / Test Fantasy Renamed / Test Epic')
+
+        with self.assertRaises(ValidationError):
+            self.test_category.parent_id = epic
+
+    def test_stage_reference_cache(self):
+        """Default stage and kanban stages come from the invalidated ormcache"""
+        Stage = self.env['library.book.stage']
+        stage = Stage.create({'name': 'Test Default Stage', 'code': 'test_default', 'is_default': True})
+        self.assertEqual(Stage._get_default_stage(), stage)
+
+        Stage._get_stage_data()
+        self.env.invalidate_all()
+        start = self.env.cr.sql_log_count
+        stages = Stage._get_ordered_stages()
+        # What the kanban grouping reads on the expanded stages
+        stages.mapped('display_name')
+        stages.mapped('fold')
+        self.assertEqual(self.env.cr.sql_log_count - start, 0)
+        self.assertIn(stage, stages)
+
+        book = self.Book.create({'name': 'Test Staged Book'})
+        self.assertEqual(book.stage_id, stage)
+
+        stage.fold = True
+        self.assertIn(stage.id, Stage._get_stage_data()['folded_ids'])
+        self.env.invalidate_all()
+        Stage._get_ordered_stages()
+        self.assertTrue(stage.fold)
+
+        other = Stage.create({'name': 'Test Other Stage', 'code': 'test_other', 'is_default': True})
+        self.assertFalse(stage.is_default)
+        self.assertEqual(Stage._get_default_stage(), other)
+        self.assertIn(other, self.Book._read_group_stage_ids(Stage, []))
+
+        other.unlink()
+        self.assertFalse(Stage._get_default_stage())
@@ -8,6 +8,7 @@ testing the complete loan workflow.
 
 from odoo.tests.common import TransactionCase
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
 from datetime import date, timedelta
 
 
@@ -40,7 +41,7 @@ class TestLibraryLoan(TransactionCase):
 
         self.test_book = self.Book.create({
             'name': 'Test Book',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'author_id': self.test_author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -139,4 +140,186 @@ class TestLibraryLoan(TransactionCase):
         
         # Should calculate correct duration
         expected_duration = (date.today() - loan_date).days
-        self.assertEqual(loan.loan_duration, expected_duration)
\ No newline at end of file
+        self.assertEqual(loan.loan_duration, expected_duration)
+
+    def test_batch_checkout_validated_together(self):
+        """A create() batch cannot lend more copies than the book has"""
+        self.test_book.total_copies = 2
+        vals = {
+            'book_id': self.test_book.id,
+            'partner_id': self.test_borrower.id,
+            'loan_date': date.today(),
+        }
+        with self.assertRaises(ValidationError):
+            self.Loan.create([vals, vals, vals])
+
+        loans = self.Loan.create([vals, vals])
+        self.assertEqual(len(loans), 2)
+        self.assertEqual(self.test_book.copies_on_loan, 2)
+        self.assertEqual(self.test_book.book_status, 'borrowed')
+
+    def test_overdue_sweep(self):
+        """The nightly sweep refreshes stale overdue flags and durations"""
+        loan = self.Loan.create({
+            'book_id': self.test_book.id,
+            'partner_id': self.test_borrower.id,
+            'loan_date': date.today(),
+            'expected_return_date': date.today() + timedelta(days=7),
+        })
+        self.assertFalse(loan.is_overdue)
+        self.assertEqual(self.test_borrower.overdue_loans_count, 0)
+
+        # Simulate twenty days passing without any write on the loan
+        self.env.flush_all()
+        self.env.cr.execute("""
+            UPDATE library_book_loan
+               SET loan_date = loan_date - 20,
+                   expected_return_date = expected_return_date - 20,
+                   write_date = write_date - interval '20 days'
+             WHERE id = %s
+        """, [loan.id])
+        self.env.invalidate_all()
+        self.assertFalse(loan.is_overdue)
+        self.assertEqual(loan.loan_duration, 0)
+        stale_write_date = loan.write_date
+
+        self.assertGreaterEqual(self.Loan._cron_refresh_overdue(), 1)
+        self.assertTrue(loan.is_overdue)
+        # The availability API validator sees the change
+        self.assertGreater(loan.write_date, stale_write_date)
+        self.assertEqual(loan.loan_duration, 20)
+        self.assertEqual(self.test_borrower.overdue_loans_count, 1)
+        self.assertEqual(self.test_borrower.on_time_loans_count, 0)
+
+        # Nothing left to refresh on a second run the same day
+        self.assertEqual(self.Loan._cron_refresh_overdue(), 0)
+
+    def test_overdue_sweep_batches(self):
+        """Small sweep batches resume after the last loan and cover them all"""
+        self.test_book.total_copies = 3
+        loans = self.Loan.create([{
+            'book_id': self.test_book.id,
+            'partner_id': self.test_borrower.id,
+            'loan_date': date.today(),
+            'expected_return_date': date.today() + timedelta(days=7),
+        } for __ in range(3)])
+        self.env.flush_all()
+        self.env.cr.execute("""
+            UPDATE library_book_loan
+               SET loan_date = loan_date - 10,
+                   expected_return_date = expected_return_date - 10
+             WHERE id IN %s
+        """, [tuple(loans.ids)])
+        self.env.invalidate_all()
+
+        self.assertGreaterEqual(self.Loan._cron_refresh_overdue(batch_size=1), 3)
+        self.assertEqual(loans.mapped('is_overdue'), [True, True, True])
+
+    def test_batch_checkin(self):
+        """Returning a cart of loans posts one summary per book"""
+        self.test_book.total_copies = 3
+        other_book = self.Book.create({
+            'name': 'Other Test Book',
+            'total_copies': 2,
+        })
+        loans = self.Loan.create([{
+            'book_id': book.id,
+            'partner_id': self.test_borrower.id,
+        } for book in (self.test_book, self.test_book, self.test_book, other_book)])
+        self.assertEqual(self.test_book.available_copies, 0)
+        self.assertEqual(self.test_borrower.active_loans_count, 4)
+        messages_before = len(self.test_book.message_ids)
+
+        result = self.Loan.checkin_loans((loans[:3] | loans[3]).ids)
+
+        self.assertEqual(sorted(result['closed']), sorted(loans.ids))
+        self.assertEqual(result['skipped'], [])
+        self.assertEqual(set(loans.mapped('state')), {'done'})
+        self.assertTrue(all(loans.mapped('return_date')))
+        self.assertEqual(self.test_book.available_copies, 3)
+        self.assertEqual(other_book.available_copies, 2)
+        self.assertEqual(self.test_borrower.active_loans_count, 0)
+        self.assertEqual(len(self.test_book.message_ids), messages_before + 1)
+
+        # Closed loans are skipped on a second check-in
+        result = self.Loan.checkin_loans(loans.ids, state='lost')
+        self.assertEqual(result['closed'], [])
+        self.assertEqual(sorted(result['skipped']), sorted(loans.ids))
+
+    def test_archive_old_loans(self):
+        """Old returned loans move to the archive without changing totals"""
+        self.env['ir.config_parameter'].sudo().set_param('library_app.loan_archive_days', '30')
+        today = date.today()
+        old, recent = self.Loan.create([{
+            'book_id': self.test_book.id,
+            'partner_id': self.test_borrower.id,
+            'loan_date': today - timedelta(days=days + 10),
+            'expected_return_date': today - timedelta(days=days + 5),
+            'return_date': today - timedelta(days=days),
+            'state': 'done',
+        } for days in (90, 10)])
+        ongoing = self.Loan.create({
+            'book_id': self.test_book.id,
+            'partner_id': self.test_borrower.id,
+            'loan_date': today - timedelta(days=120),
+        })
+        self.assertEqual(self.test_book.loan_count, 3)
+
+        self.assertEqual(self.Loan._cron_archive_loans(batch_size=1), 1)
+        self.assertFalse(old.exists())
+        self.assertTrue(recent.exists() and ongoing.exists())
+
+        archive = self.test_book.archived_loan_ids
+        self.assertEqual(len(archive), 1)
+        self.assertEqual(archive.partner_id, self.test_borrower)
+        self.assertEqual(archive.return_date, today - timedelta(days=90))
+        self.assertTrue(archive.was_overdue)
+        self.assertEqual(self.test_book.loan_count, 3)
+        self.assertEqual(self.test_borrower.loan_history_count, 3)
+        # Onchange snapshots count the loans of the record they edit
+        self.assertEqual(self.Book.new(origin=self.test_book).loan_count, 3)
+        self.assertEqual(self.test_borrower.new(origin=self.test_borrower).loan_history_count, 3)
+        self.assertEqual(self.test_borrower.archived_loan_ids, archive)
+
+    def test_hot_queries_use_indexes(self):
+        """Availability, borrower, overdue and list queries avoid sequential scans"""
+        books = self.test_book | self.Book.create([
+            {'name': f'Test Index Book {i}', 'total_copies': 100} for i in range(49)
+        ])
+        partners = self.test_borrower | self.env['res.partner'].create([
+            {'name': f'Test Index Borrower {i}'} for i in range(49)
+        ])
+        self.env.flush_all()
+        # Acervo com histórico: 20000 empréstimos em 50 livros e 50 mutuários,
+        # 5% em andamento, o resto devolvido; sem ``enable_seqscan = off``,
+        # o plano é o que o PostgreSQL escolhe com estatísticas reais
+        self.env.cr.execute("""
+            INSERT INTO library_book_loan (book_id, partner_id, loan_date, expected_return_date,
+                                           return_date, state, quantity)
+            SELECT (%s::int[])[1 + (n / 3) %% 50], (%s::int[])[1 + (n / 7) %% 50],
+                   CURRENT_DATE - n %% 365,
+                   CURRENT_DATE - n %% 365 + 14,
+                   CASE WHEN n %% 20 = 0 THEN NULL ELSE CURRENT_DATE - n %% 365 + 7 END,
+                   CASE WHEN n %% 20 = 0 THEN 'ongoing' ELSE 'done' END,
+                   1
+              FROM generate_series(1, 20000) n
+        """, [books.ids, partners.ids])
+        self.env.cr.execute("ANALYZE library_book_loan")
+        queries = {
+            'library_book_loan_book_open_idx': self.Book._loan_quantities_query([self.test_book.id]),
+            'library_book_loan_partner_state_idx': self.Loan._search([
+                ('partner_id', '=', self.test_borrower.id),
+                ('state', '=', 'ongoing'),
+                ('is_overdue', '=', True),
+            ]).select(),
+            'library_book_loan_expected_ongoing_idx': self.Loan._search([
+                ('state', '=', 'ongoing'),
+                ('expected_return_date', '<', date.today()),
+            ]).select(),
+            'library_book_loan_loan_date_idx': self.Loan._search([], limit=80).select(),
+        }
+        for index, query in queries.items():
+            self.env.cr.execute(SQL("EXPLAIN %s", query))
+            plan = "\n".join(row[0] for row in self.env.cr.fetchall())
+            self.assertNotIn('Seq Scan on library_book_loan', plan, index)
+            self.assertIn(index, plan, index)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for concurrent loan checkout
+
+Two kiosks lending the last copy of the same book at the same moment. Each
+kiosk runs in its own committed transaction, so these tests use real cursors
+instead of the shared TransactionCase cursor.
+"""
+
+from contextlib import contextmanager
+
+import psycopg2
+
+from odoo import api, SUPERUSER_ID
+from odoo.exceptions import ValidationError
+from odoo.modules.registry import Registry
+from odoo.tests import common, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestLoanConcurrency(common.BaseCase):
+    """Test cases for row locking during loan checkout"""
+
+    @contextmanager
+    def environment(self):
+        """Yield an environment on a fresh cursor that commits on exit"""
+        registry = Registry(common.get_db_name())
+        with registry.cursor() as cr:
+            yield api.Environment(cr, SUPERUSER_ID, {})
+
+    def setUp(self):
+        """Commit a single-copy book and two borrowers"""
+        super().setUp()
+        with self.environment() as env:
+            self.book_id = env['library.book'].create({
+                'name': 'Concurrency Test Book',
+                'total_copies': 1,
+            }).id
+            self.partner_ids = env['res.partner'].create([
+                {'name': 'Kiosk Borrower A', 'is_company': False},
+                {'name': 'Kiosk Borrower B', 'is_company': False},
+            ]).ids
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.environment() as env:
+            loans = env['library.book.loan'].search([('book_id', '=', self.book_id)])
+            loans.write({'state': 'done'})
+            loans.unlink()
+            env['library.book'].browse(self.book_id).unlink()
+            env['res.partner'].browse(self.partner_ids).unlink()
+
+    def _loan_vals(self, partner_id):
+        return {
+            'book_id': self.book_id,
+            'partner_id': partner_id,
+        }
+
+    def test_concurrent_checkout_last_copy(self):
+        """The second kiosk waits for the first one and then sees no copy left"""
+        with self.environment() as env_a, self.environment() as env_b:
+            env_a['library.book.loan'].create(self._loan_vals(self.partner_ids[0]))
+
+            # Kiosk A holds the book row lock until it commits
+            env_b.cr.execute("SET LOCAL lock_timeout = '500ms'")
+            with self.assertRaises(psycopg2.errors.LockNotAvailable), mute_logger('odoo.sql_db'):
+                env_b['library.book.loan'].create(self._loan_vals(self.partner_ids[1]))
+            env_b.cr.rollback()
+
+            env_a.cr.commit()
+
+            # Kiosk B retries after A committed: the last copy is gone
+            with self.assertRaises(ValidationError):
+                env_b['library.book.loan'].create(self._loan_vals(self.partner_ids[1]))
+            env_b.cr.rollback()
+
+        with self.environment() as env:
+            book = env['library.book'].browse(self.book_id)
+            self.assertEqual(len(book.loan_ids), 1)
+            self.assertEqual(book.copies_on_loan, 1)
+            self.assertEqual(book.available_copies, 0)
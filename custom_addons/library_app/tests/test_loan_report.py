@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the loan analysis report
+
+The report reads a materialized view; these tests refresh it inside the
+test transaction and check the aggregated measures.
+"""
+
+from datetime import date, timedelta
+
+from odoo.exceptions import AccessError
+from odoo.tests.common import TransactionCase, new_test_user
+
+
+class TestLoanReport(TransactionCase):
+    """Test cases for library.loan.report"""
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.Report = self.env['library.loan.report']
+        self.category = self.env['library.book.category'].create({
+            'name': 'Report Category',
+            'code': 'REPCAT',
+        })
+        self.borrower = self.env['res.partner'].create({'name': 'Report Borrower'})
+        self.book = self.env['library.book'].create({
+            'name': 'Report Book',
+            'total_copies': 5,
+            'category_ids': [(6, 0, [self.category.id])],
+        })
+
+    def test_report_aggregates(self):
+        """Loans and archived loans are counted once with weighted averages"""
+        today = date.today()
+        self.env['library.book.loan'].create([{
+            'book_id': self.book.id,
+            'partner_id': self.borrower.id,
+            'loan_date': today - timedelta(days=10),
+            'expected_return_date': today - timedelta(days=8),
+            'return_date': today - timedelta(days=6),
+            'state': 'done',
+        }, {
+            'book_id': self.book.id,
+            'partner_id': self.borrower.id,
+            'loan_date': today - timedelta(days=2),
+            'expected_return_date': today + timedelta(days=12),
+        }])
+        self.env['library.book.loan.archive'].create({
+            'book_id': self.book.id,
+            'partner_id': self.borrower.id,
+            'loan_date': today - timedelta(days=400),
+            'return_date': today - timedelta(days=394),
+        })
+        self.Report._refresh()
+
+        groups = self.Report._read_group(
+            [('category_id', '=', self.category.id)],
+            aggregates=['loan_count:sum', 'ongoing_count:sum', 'avg_duration:avg', 'overdue_rate:avg'],
+        )
+        loan_count, ongoing_count, avg_duration, overdue_rate = groups[0]
+        self.assertEqual(loan_count, 3)
+        self.assertEqual(ongoing_count, 1)
+        # (4 + 2 + 6) / 3 days, one late loan out of three
+        self.assertAlmostEqual(avg_duration, 4.0)
+        self.assertAlmostEqual(overdue_rate, 100 / 3)
+
+        by_partner = self.Report._read_group(
+            [('partner_id', '=', self.borrower.id)], ['partner_id'], ['loan_count:sum'],
+        )
+        self.assertEqual(by_partner, [(self.borrower, 3)])
+
+    def test_refresh_restricted_to_managers(self):
+        """Only library managers can trigger an on-demand refresh"""
+        user = new_test_user(self.env, login='report_user', groups='base.group_user')
+        with self.assertRaises(AccessError):
+            self.Report.with_user(user).action_refresh()
+        manager = new_test_user(self.env, login='report_manager',
+                                groups='base.group_user,library_app.group_library_manager')
+        action = self.Report.with_user(manager).action_refresh()
+        self.assertEqual(action['tag'], 'reload')
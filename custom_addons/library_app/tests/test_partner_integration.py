@@ -6,6 +6,8 @@ This module contains tests for the res.partner model extensions
 and author functionality.
 """
 
+from datetime import date, timedelta
+
 from odoo.tests.common import TransactionCase
 
 
@@ -47,7 +49,7 @@ class TestPartnerIntegration(TransactionCase):
         # Create multiple books for this author
         book1 = self.Book.create({
             'name': 'First Book',
-            'isbn': '1111111111111',
+            'isbn': '1111111111116',
             'author_id': author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -65,6 +67,29 @@ class TestPartnerIntegration(TransactionCase):
         self.assertIn(book1, author.book_ids)
         self.assertIn(book2, author.book_ids)
 
+    def test_author_publication_metrics(self):
+        """Publication dates are real dates, aggregated over active books"""
+        author = self.Partner.create({'name': 'Dated Author', 'is_author': True})
+        books = self.Book.create([
+            {'name': 'Early Work', 'author_id': author.id, 'date_published': date(1990, 5, 1)},
+            {'name': 'Late Work', 'author_id': author.id, 'date_published': date(2015, 3, 1)},
+            {'name': 'Undated Work', 'author_id': author.id},
+        ])
+        self.assertEqual(author.book_count, 3)
+        self.assertEqual(author.first_publication, date(1990, 5, 1))
+        self.assertEqual(author.last_publication, date(2015, 3, 1))
+        self.assertEqual(author.publication_span, 25)
+
+        books[0].active = False
+        self.assertEqual(author.book_count, 2)
+        self.assertEqual(author.first_publication, date(2015, 3, 1))
+        self.assertEqual(author.publication_span, 0)
+
+        found = self.Partner.search([
+            ('id', '=', author.id), ('last_publication', '>=', date(2010, 1, 1)),
+        ])
+        self.assertEqual(found, author)
+
     def test_author_search_domain(self):
         """Test author search domain filters"""
         # Create regular partner
@@ -103,7 +128,7 @@ class TestPartnerIntegration(TransactionCase):
         
         book = self.Book.create({
             'name': 'Test Book',
-            'isbn': '1234567890123',
+            'isbn': '1234567890128',
             'author_id': author.id,
             'category_ids': [(6, 0, [self.test_category.id])],
         })
@@ -125,4 +150,53 @@ class TestPartnerIntegration(TransactionCase):
         })
         
         # Display name should include the name
-        self.assertIn('Jane Doe', author.display_name)
\ No newline at end of file
+        self.assertIn('Jane Doe', author.display_name)
+
+    def test_borrower_stats_table(self):
+        """Loan metrics are kept in library.borrower.stats, not on res.partner"""
+        borrower = self.Partner.create({
+            'name': 'Stats Borrower',
+            'is_company': False,
+        })
+        idle = self.Partner.create({
+            'name': 'Idle Borrower',
+            'is_company': False,
+        })
+        book = self.Book.create({
+            'name': 'Stats Book',
+            'total_copies': 3,
+            'category_ids': [(6, 0, [self.test_category.id])],
+        })
+        Loan = self.env['library.book.loan']
+        on_time = Loan.create({
+            'book_id': book.id,
+            'partner_id': borrower.id,
+            'expected_return_date': date.today() + timedelta(days=7),
+        })
+        Loan.create({
+            'book_id': book.id,
+            'partner_id': borrower.id,
+            'loan_date': date.today() - timedelta(days=30),
+            'expected_return_date': date.today() - timedelta(days=15),
+        })
+
+        stats = self.env['library.borrower.stats'].search([('partner_id', '=', borrower.id)])
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats.active_loans_count, 2)
+        self.assertEqual(stats.overdue_loans_count, 1)
+        self.assertEqual(stats.on_time_loans_count, 1)
+        self.assertEqual(borrower.active_loans_count, 2)
+        self.assertEqual(borrower.overdue_loans_count, 1)
+        self.assertEqual(borrower.on_time_loans_count, 1)
+
+        partners = self.Partner.search([('id', 'in', (borrower | idle).ids)])
+        self.assertEqual(partners.filtered_domain([('active_loans_count', '>', 0)]), borrower)
+        self.assertEqual(
+            self.Partner.search([('id', 'in', partners.ids), ('overdue_loans_count', '=', 0)]),
+            idle,
+        )
+
+        on_time.action_return_book()
+        self.assertEqual(borrower.active_loans_count, 1)
+        self.assertEqual(borrower.on_time_loans_count, 0)
+        self.assertEqual(borrower.overdue_loans_count, 1)
@@ -23,7 +23,7 @@ class TestPartnerLoanFiltering(TransactionCase):
         # Create test books
         self.test_book1 = self.Book.create({
             'name': 'Test Book 1',
-            'isbn': '1111111111111',
+            'isbn': '1111111111116',
         })
         
         self.test_book2 = self.Book.create({
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the opt-in performance instrumentation
+
+Checks that samples are only recorded when enabled, that budgets flag
+slow calls, and that the percentile view aggregates the samples.
+"""
+
+from unittest.mock import patch
+
+from odoo.exceptions import ValidationError
+from odoo.tests.common import TransactionCase
+from odoo.tools import mute_logger
+
+
+class TestPerfSample(TransactionCase):
+    """Test cases for library.perf.sample"""
+
+    def setUp(self):
+        """Set up test data"""
+        super().setUp()
+        self.Sample = self.env['library.perf.sample']
+        self.params = self.env['ir.config_parameter'].sudo()
+        self.Sample.search([]).unlink()
+
+    def test_disabled_by_default(self):
+        """No sample is recorded while the instrumentation is off"""
+        self.params.set_param('library_app.perf_instrumentation', False)
+        self.env['library.book'].create({'name': 'Perf Off Book'})
+        self.assertFalse(self.Sample.search([]))
+
+    def test_samples_and_percentiles(self):
+        """Hot paths record samples, over-budget calls are flagged"""
+        self.params.set_param('library_app.perf_instrumentation', '1')
+        self.params.set_param('library_app.perf_budget_queries', '0')
+        with mute_logger('odoo.addons.library_app.models.perf_sample'):
+            books = self.env['library.book'].create([{'name': 'Perf On Book'}, {'name': 'Perf On Book 2'}])
+            books.write({'pages': 10})
+        self.env.flush_all()
+
+        create = self.Sample.search([('key', '=', 'library.book.create')])
+        self.assertEqual(len(create), 1)
+        self.assertEqual(create.record_count, 2)
+        self.assertGreater(create.query_count, 0)
+        self.assertTrue(create.over_budget)
+
+        report = self.env['library.perf.sample.report'].search([('key', '=', 'library.book.write')])
+        self.assertGreaterEqual(report.sample_count, 1)
+        self.assertGreaterEqual(report.wall_p95, report.wall_p50)
+
+    def test_failed_call_sampled(self):
+        """Calls that raise are still sampled and flagged as failed"""
+        book = self.env['library.book'].create({'name': 'Perf Failing Book'})
+        self.params.set_param('library_app.perf_instrumentation', '1')
+        # Not assertRaises: its savepoint rollback would drop the sample
+        try:
+            book.write({'pages': -5})
+        except ValidationError:
+            pass
+        else:
+            self.fail("The invalid write should have raised")
+
+        sample = self.Sample.search([('key', '=', 'library.book.write')])
+        self.assertEqual(len(sample), 1)
+        self.assertTrue(sample.failed)
+        self.assertEqual(sample.record_count, 1)
+        report = self.env['library.perf.sample.report'].search([('key', '=', 'library.book.write')])
+        self.assertEqual(report.failed_count, 1)
+
+    def test_failed_recording_keeps_original_error(self):
+        """A failure while sampling a failed call never masks its exception"""
+        book = self.env['library.book'].create({'name': 'Perf Aborted Book'})
+        self.params.set_param('library_app.perf_instrumentation', '1')
+        with patch.object(type(self.Sample), '_insert_sample',
+                          side_effect=RuntimeError("current transaction is aborted")), \
+                mute_logger('odoo.addons.library_app.models.perf_sample'), \
+                self.assertRaises(ValidationError):
+            book.write({'pages': -5})
+
+    def test_purge(self):
+        """The purge cron drops samples outside the retention window"""
+        self.Sample._record('test.old', 'library.book', 1, 1, 0.1, 1.0)
+        self.env.cr.execute(
+            "UPDATE library_perf_sample SET create_date = create_date - interval '30 days'"
+        )
+        self.Sample._record('test.new', 'library.book', 1, 1, 0.1, 1.0)
+        self.Sample._cron_purge()
+        self.assertEqual(self.Sample.search([]).mapped('key'), ['test.new'])
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Performance regression tests
+
+Seeds a catalogue with authors, categories, borrowers and loans, then runs
+each hot path on a small and a large slice of it. The query count must not
+grow with the number of records (no N+1), must stay under an absolute
+budget, and the large run must finish within a wall-clock bound.
+
+Run only these tests with ``--test-tags /library_app:perf``.
+"""
+
+import logging
+import time
+from datetime import date, timedelta
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('perf', 'post_install', '-at_install')
+class TestPerformance(TransactionCase):
+    """Query-count budgets for library hot paths"""
+
+    BOOKS = 300
+    SMALL = 10
+    LARGE = 100
+    # Consultas extras toleradas entre a execução pequena e a grande
+    SLACK = 3
+    MAX_SECONDS = 5.0
+
+    @classmethod
+    def setUpClass(cls):
+        """Seed a realistic dataset once for the whole class"""
+        super().setUpClass()
+        env = cls.env(context=dict(cls.env.context, library_bulk_mode=True))
+        cls.Book = env['library.book']
+        cls.Loan = env['library.book.loan']
+        categories = env['library.book.category'].create([
+            {'name': f'Perf Category {i}', 'code': f'PERF{i}'} for i in range(8)
+        ])
+        authors = env['res.partner'].create([
+            {'name': f'Perf Author {i}', 'is_author': True} for i in range(30)
+        ])
+        cls.borrowers = env['res.partner'].create([
+            {'name': f'Perf Borrower {i}'} for i in range(cls.LARGE)
+        ])
+        cls.books = cls.Book.create([{
+            'name': f'Perf Book {i:04d}',
+            'author_id': authors[i % len(authors)].id,
+            'category_ids': [(6, 0, categories[i % len(categories)].ids)],
+            'total_copies': 3,
+            'description': f'<p>Perf description {i}</p>',
+        } for i in range(cls.BOOKS)])
+        today = date.today()
+        cls.Loan.create([{
+            'book_id': cls.books[i].id,
+            'partner_id': cls.borrowers[i % len(cls.borrowers)].id,
+            'loan_date': today - timedelta(days=i % 40),
+            'expected_return_date': today + timedelta(days=14 - i % 40),
+        } for i in range(cls.BOOKS // 2)])
+        env.flush_all()
+
+    def _measure(self, func):
+        """Run ``func`` on a cold cache; return (query count, seconds)"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        start_queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - start_queries, time.perf_counter() - start
+
+    def assertScales(self, name, func, small, large, budget):
+        """``func(records)`` issues the same queries for ``small`` and ``large``"""
+        func(small)  # aquece ormcache e prefetch de metadados
+        small_queries, __ = self._measure(lambda: func(small))
+        large_queries, elapsed = self._measure(lambda: func(large))
+        _logger.info("perf %s: %s/%s queries (%s/%s records), %.3fs",
+                     name, small_queries, large_queries, len(small), len(large), elapsed)
+        self.assertLessEqual(large_queries, small_queries + self.SLACK,
+                             f"{name}: query count grows with the number of records")
+        self.assertLessEqual(large_queries, budget, f"{name}: query budget exceeded")
+        self.assertLess(elapsed, self.MAX_SECONDS, f"{name}: too slow")
+
+    def test_book_list_performance(self):
+        """Book list read does not query per book"""
+        fields_list = ['name', 'isbn', 'author_id', 'stage_id', 'category_ids', 'book_status',
+                       'available_copies', 'copies_on_loan', 'loan_count', 'display_name']
+        self.assertScales(
+            'book list', lambda books: books.web_read({f: {} for f in fields_list}),
+            self.books[:self.SMALL], self.books[:self.LARGE], budget=15,
+        )
+
+    def test_search_performance(self):
+        """Title, full-text and typeahead searches run a bounded number of queries"""
+        searches = {
+            'title search': lambda: self.Book.search_read([('name', 'ilike', 'Perf Book 01')], ['name']),
+            'full-text search': lambda: self.Book.search([('search_text', 'ilike', 'description')], limit=80),
+            'typeahead': lambda: self.Book.name_search('Perf Book', limit=8),
+        }
+        for name, func in searches.items():
+            func()
+            queries, elapsed = self._measure(func)
+            _logger.info("perf %s: %s queries, %.3fs", name, queries, elapsed)
+            self.assertLessEqual(queries, 6, f"{name}: query budget exceeded")
+            self.assertLess(elapsed, self.MAX_SECONDS, f"{name}: too slow")
+
+    def test_loan_creation_performance(self):
+        """Batch loan creation and return do not query per loan"""
+        free_books = self.books[self.BOOKS // 2:]
+        borrower = self.borrowers[0]
+
+        def checkout_and_return(books):
+            loans = self.Loan.create([
+                {'book_id': book.id, 'partner_id': borrower.id} for book in books
+            ])
+            loans.action_return_book()
+
+        self.assertScales('loan create/return', checkout_and_return,
+                          free_books[:self.SMALL], free_books[:self.LARGE], budget=60)
+
+    def test_partner_metrics_performance(self):
+        """Borrower metric refresh and read do not query per partner"""
+        Stats = self.env['library.borrower.stats']
+
+        def refresh_and_read(partners):
+            Stats._refresh(partners)
+            partners.read(['active_loans_count', 'overdue_loans_count', 'on_time_loans_count'])
+
+        self.assertScales('partner metrics', refresh_and_read,
+                          self.borrowers[:self.SMALL], self.borrowers[:self.LARGE], budget=10)
+
+    def test_kanban_read_group_performance(self):
+        """Kanban grouping by stage is independent of the number of books"""
+        def kanban(books):
+            self.Book.web_read_group(
+                [('id', 'in', books.ids)], ['available_copies:sum'], ['stage_id'],
+            )
+
+        self.assertScales('kanban read_group', kanban,
+                          self.books[:self.SMALL], self.books, budget=10)